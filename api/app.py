@@ -1,29 +1,339 @@
 from flask import Flask, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+import atexit
 import sqlite3
 import json
 import numpy as np
 from datetime import datetime
 import os
+import queue
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+
+try:
+    from numba import njit
+except ImportError:  # numba is an optional accelerator
+    njit = None
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional accelerator
+    orjson = None
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes compact responses with orjson.
+    Keys stay sorted and dates, decimals and dataclasses still go through
+    Flask's default handler; debug pretty-printing uses the json module.
+    """
+    
+    def _options(self):
+        options = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+                   | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+        return options | orjson.OPT_SORT_KEYS if self.sort_keys else options
+    
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode()
+    
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self._options() | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
 
 # Initialize Flask app
 app = Flask(__name__)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 CORS(app)  # Enable CORS for frontend integration
 
 # Database configuration
 DATABASE = 'dss.db'
 
-def get_db_connection():
-    """Create database connection with row factory for dict-like access"""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+# Column order of the decision matrix (rows = countries, columns = criteria)
+CRITERIA_ORDER = ('cost_of_living', 'university_ranking', 'language_barrier',
+                  'visa_difficulty', 'job_prospects', 'climate_score', 'safety_index')
+
+# Criteria types (cost or benefit)
+CRITERIA_TYPES = {
+    'cost_of_living': 'cost',      # Lower is better
+    'university_ranking': 'benefit', # Higher is better
+    'language_barrier': 'cost',     # Lower is better
+    'visa_difficulty': 'cost',      # Lower is better
+    'job_prospects': 'benefit',     # Higher is better
+    'climate_score': 'benefit',     # Higher is better
+    'safety_index': 'benefit'       # Higher is better
+}
+
+# True where the criterion at the same CRITERIA_ORDER position is a cost
+COST_MASK = np.array([CRITERIA_TYPES[criterion] == 'cost' for criterion in CRITERIA_ORDER])
+COST_MASK.flags.writeable = False
+
+# Request weight names aligned with CRITERIA_ORDER
+WEIGHT_NAMES = ('cost_weight', 'ranking_weight', 'language_weight', 'visa_weight',
+                'job_weight', 'climate_weight', 'safety_weight')
+
+# Weight keys used by the SAW analysis, aligned with CRITERIA_ORDER
+ANALYSIS_WEIGHT_KEYS = tuple(criterion + '_weight' for criterion in CRITERIA_ORDER)
+
+# Fields a country is created with; also the fields that may be updated
+COUNTRY_VALUE_FIELDS = ('name',) + CRITERIA_ORDER
+
+# Weight variations tested by the sensitivity analysis
+SENSITIVITY_VARIATIONS = (-0.2, -0.1, 0, 0.1, 0.2)
+
+INSERT_COUNTRY_SQL = '''
+    INSERT INTO countries (name, cost_of_living, university_ranking, 
+                         language_barrier, visa_difficulty, job_prospects, 
+                         climate_score, safety_index)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Duplicate names are skipped in the same statement; rowcount tells them apart
+ADD_COUNTRY_SQL = INSERT_COUNTRY_SQL.rstrip() + '\n    ON CONFLICT (name) DO NOTHING\n'
+
+# Fields returned by GET /api/countries, in SELECT order
+COUNTRY_FIELDS = ('id',) + COUNTRY_VALUE_FIELDS
+
+SELECT_COUNTRIES_SQL = 'SELECT %s FROM countries ORDER BY name' % ', '.join(COUNTRY_FIELDS)
+
+INSERT_PREFERENCE_SQL = '''
+    INSERT INTO user_preferences 
+    (session_id, cost_weight, ranking_weight, language_weight, 
+     visa_weight, job_weight, climate_weight, safety_weight)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_RESULT_SQL = '''
+    INSERT INTO decision_results (session_id, country_scores, preferences)
+    VALUES (?, ?, ?)
+'''
+
+# Maximum number of pooled SQLite connections
+DB_POOL_SIZE = 8
+
+# Prepared statements kept per pooled connection (SQL above is reused verbatim)
+DB_STATEMENT_CACHE_SIZE = 256
+
+# Read-heavy tuning applied to each pooled connection. WAL with synchronous=NORMAL
+# keeps fsync off the read path; the page cache is private to each connection
+# (up to DB_POOL_SIZE x 32 MB resident under load), while the 256 MB mmap window
+# is address space served from the shared OS page cache and only costs memory
+# for pages actually touched. Lower cache_size first if memory is tight.
+DB_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-32768',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA temp_store=MEMORY',
+)
+
+# Background decision_results writer: queue bound, rows per transaction,
+# and how long a batch waits for more rows before it is written
+RESULT_QUEUE_SIZE = 1000
+RESULT_BATCH_SIZE = 100
+RESULT_FLUSH_INTERVAL = 0.1
+
+# In-process cache of the country decision matrix, invalidated by data writes
+# here (the counter) or by any other connection or worker (PRAGMA data_version)
+_data_version = 0
+_data_version_lock = threading.Lock()
+_stamp_conn = None
+_country_cache = (None, None, None, None)  # (data stamp, names, matrix, columns)
+
+class DBPool:
+    """Bounded pool of long-lived SQLite connections shared across requests"""
+    
+    def __init__(self, database, size=DB_POOL_SIZE):
+        self.database = database
+        self.size = size
+        self._idle = queue.Queue(maxsize=size)
+        self._created = 0
+        self._lock = threading.Lock()
+    
+    def _connect(self):
+        """Open a connection with row factory for dict-like access and hot-cache PRAGMAs"""
+        conn = sqlite3.connect(self.database, check_same_thread=False,
+                               cached_statements=DB_STATEMENT_CACHE_SIZE)
+        conn.row_factory = sqlite3.Row
+        for pragma in DB_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def get(self):
+        """Check out an idle connection, opening a new one while under the pool size"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        
+        return self._idle.get()
+    
+    def put(self, conn):
+        """Return a connection to the pool"""
+        self._idle.put(conn)
+
+db_pool = DBPool(DATABASE)
+
+@contextmanager
+def db_conn():
+    """
+    Borrow a pooled connection. Work left uncommitted, whether from an error
+    or an early return, is rolled back so the pool never hands out a
+    connection with an open transaction
+    """
+    conn = db_pool.get()
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        db_pool.put(conn)
+
+@lru_cache(maxsize=None)
+def update_country_sql(fields):
+    """UPDATE statement for a tuple of COUNTRY_VALUE_FIELDS, built once per field set"""
+    return f"UPDATE countries SET {', '.join(field + ' = ?' for field in fields)} WHERE id = ?"
+
+_result_queue = queue.Queue(maxsize=RESULT_QUEUE_SIZE)
+_result_writer = None
+_RESULT_STOP = object()  # Queue marker that ends the background writer
+_result_writer_lock = threading.Lock()
+
+def write_results(rows):
+    """Insert decision_results rows in a single transaction"""
+    with db_conn() as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        conn.executemany(INSERT_RESULT_SQL, rows)
+        conn.commit()
+
+def _drain_results():
+    """Background writer: persist queued results in batches until the stop marker"""
+    while True:
+        items = [_result_queue.get()]
+        while items[-1] is not _RESULT_STOP and len(items) < RESULT_BATCH_SIZE:
+            try:
+                items.append(_result_queue.get(timeout=RESULT_FLUSH_INTERVAL))
+            except queue.Empty:
+                break
+        
+        rows = [item for item in items if item is not _RESULT_STOP]
+        try:
+            if rows:
+                write_results(rows)
+        except Exception as e:
+            app.logger.error(f'Failed to save {len(rows)} decision results: {str(e)}')
+        finally:
+            for _ in items:
+                _result_queue.task_done()
+        
+        if items[-1] is _RESULT_STOP:
+            return
+
+def _stop_result_writer():
+    """Write out queued results and stop the background writer (runs at exit)"""
+    global _result_writer
+    with _result_writer_lock:
+        writer, _result_writer = _result_writer, None
+    if writer is not None:
+        _result_queue.put(_RESULT_STOP)
+        writer.join()
+
+def queue_result(session_id, results, weights):
+    """Hand a decision result to the background writer, writing inline if it is backed up"""
+    global _result_writer
+    row = (session_id, json.dumps(results), json.dumps(weights))
+    
+    if _result_writer is None:
+        with _result_writer_lock:
+            if _result_writer is None:
+                _result_writer = threading.Thread(target=_drain_results, daemon=True,
+                                                  name='decision-results-writer')
+                _result_writer.start()
+                atexit.register(_stop_result_writer)
+    
+    try:
+        _result_queue.put_nowait(row)
+    except queue.Full:
+        write_results([row])
+
+def bump_data_version():
+    """Mark cached country data as stale after a write to the countries table"""
+    global _data_version
+    with _data_version_lock:
+        _data_version += 1
+
+def _data_stamp():
+    """
+    (local write counter, PRAGMA data_version) for the country cache. data_version
+    is read on one dedicated connection that never writes, so it moves on every
+    commit made elsewhere: pooled connections, other gunicorn workers, other apps.
+    """
+    global _stamp_conn
+    with _data_version_lock:
+        if _stamp_conn is None:
+            _stamp_conn = sqlite3.connect(DATABASE, check_same_thread=False)
+        return _data_version, _stamp_conn.execute('PRAGMA data_version').fetchone()[0]
+
+def _load_country_data():
+    """Return the cached country data, re-reading the countries table only after it has changed"""
+    global _country_cache
+    version = _data_stamp()
+    if _country_cache[0] == version:
+        return _country_cache
+    
+    with db_conn() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        rows = cursor.execute(SELECT_COUNTRIES_SQL).fetchall()
+    
+    # Column-oriented copy of the table, one list per COUNTRY_FIELDS entry
+    columns = dict(zip(COUNTRY_FIELDS, map(list, zip(*rows)))) if rows else {field: [] for field in COUNTRY_FIELDS}
+    
+    names = columns['name']
+    matrix = np.array([row[2:] for row in rows], dtype=np.float64).reshape(len(rows), len(CRITERIA_ORDER))
+    matrix.flags.writeable = False
+    
+    _country_cache = (version, names, matrix, columns)
+    return _country_cache
+
+def get_country_matrix():
+    """Get (country names, (countries, criteria) matrix) ordered by name"""
+    _, names, matrix, _ = _load_country_data()
+    return names, matrix
+
+def get_country_columns():
+    """Get the countries table as {field: [values ordered by name]}"""
+    return _load_country_data()[3]
 
 def init_database():
     """Initialize database with required tables and sample data"""
     conn = sqlite3.connect(DATABASE)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
     cursor = conn.cursor()
     
+    # Schema and sample data are written in a single transaction (one fsync)
+    cursor.execute('BEGIN IMMEDIATE')
+    
     # Create countries table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS countries (
@@ -40,6 +350,14 @@ def init_database():
         )
     ''')
     
+    # name is UNIQUE, so its autoindex already orders the scan; this covering
+    # index also carries the criteria so the matrix and listing queries are
+    # answered from the index alone (the id is the rowid stored in each entry)
+    cursor.execute(f'''
+        CREATE INDEX IF NOT EXISTS idx_countries_name_criteria
+        ON countries (name, {', '.join(CRITERIA_ORDER)})
+    ''')
+    
     # Create user preferences table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS user_preferences (
@@ -86,69 +404,95 @@ def init_database():
             ('France', 6.5, 8.0, 7.0, 5.5, 6.0, 7.5, 7.5)
         ]
         
-        cursor.executemany('''
-            INSERT INTO countries (name, cost_of_living, university_ranking, 
-                                 language_barrier, visa_difficulty, job_prospects, 
-                                 climate_score, safety_index)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', sample_countries)
+        cursor.executemany(INSERT_COUNTRY_SQL, sample_countries)
     
     conn.commit()
     conn.close()
+    bump_data_version()
+
+def _sensitivity_scores_loop(normalized, weights, deltas):
+    """SAW scores for every (criterion, variation) weight perturbation, shape (C, D, N)"""
+    num_countries, num_criteria = normalized.shape
+    out = np.empty((weights.size, deltas.size, num_countries))
+    
+    # One working copy, perturbed in place and restored after each criterion
+    modified = weights.copy()
+    for j in range(weights.size):
+        for d in range(deltas.size):
+            modified[j] = weights[j] * (1 + deltas[d])
+            for i in range(num_countries):
+                score = 0.0
+                for k in range(num_criteria):
+                    score += normalized[i, k] * modified[k]
+                out[j, d, i] = score
+        modified[j] = weights[j]
+    
+    return out
+
+def _sensitivity_scores_numpy(normalized, weights, deltas):
+    """NumPy equivalent of the sensitivity kernel using one batched matmul"""
+    modified = np.tile(weights, (weights.size, deltas.size, 1))
+    criteria = np.arange(weights.size)
+    modified[criteria, :, criteria] *= 1 + deltas
+    return modified @ normalized.T
+
+if njit is not None:
+    _sensitivity_scores = njit(cache=True, fastmath=True)(_sensitivity_scores_loop)
+    # Compile at import so the first request does not pay the JIT cost
+    _sensitivity_scores(np.ones((1, 1)), np.ones(1), np.zeros(1))
+else:
+    _sensitivity_scores = _sensitivity_scores_numpy
 
 class DecisionAnalyzer:
     """Decision analysis algorithms for country recommendation"""
     
     @staticmethod
-    def normalize_data(data, criteria_types):
+    def normalize_data(matrix, criteria_mask):
         """
         Normalize data using min-max normalization
-        criteria_types: dict with 'benefit' or 'cost' for each criterion
+        matrix: (countries, criteria) float array in CRITERIA_ORDER column order
+        criteria_mask: boolean array, True where the criterion is a cost
         """
-        normalized = {}
+        min_vals = matrix.min(axis=0)
+        max_vals = matrix.max(axis=0)
+        value_range = max_vals - min_vals
         
-        for criterion, values in data.items():
-            min_val = min(values)
-            max_val = max(values)
-            
-            if max_val == min_val:
-                normalized[criterion] = [1.0] * len(values)
-            else:
-                if criteria_types.get(criterion) == 'cost':
-                    # For cost criteria, lower is better (inverse normalization)
-                    normalized[criterion] = [(max_val - val) / (max_val - min_val) for val in values]
-                else:
-                    # For benefit criteria, higher is better
-                    normalized[criterion] = [(val - min_val) / (max_val - min_val) for val in values]
-        
-        return normalized
+        # For cost criteria, lower is better (inverse normalization)
+        normalized = np.where(criteria_mask, max_vals - matrix, matrix - min_vals)
+        normalized = normalized / np.where(value_range == 0, 1.0, value_range)
+        
+        # Constant criteria do not discriminate between countries
+        return np.where(value_range == 0, 1.0, normalized)
     
     @staticmethod
-    def saw_algorithm(normalized_data, weights, country_names):
+    def saw_algorithm(normalized_matrix, weights, country_names):
         """
         Simple Additive Weighting (SAW) algorithm
         Returns sorted list of countries with scores
         """
-        scores = []
-        num_countries = len(country_names)
+        weight_vector = np.array([weights.get(key, 0.0) for key in ANALYSIS_WEIGHT_KEYS], dtype=np.float64)
+        scores = normalized_matrix.dot(weight_vector)
         
-        for i in range(num_countries):
-            score = 0
-            for criterion, norm_values in normalized_data.items():
-                weight_key = criterion + '_weight'
-                if weight_key in weights:
-                    score += weights[weight_key] * norm_values[i]
-            scores.append(score)
-        
-        # Create country-score pairs and sort by score (descending)
-        country_scores = list(zip(country_names, scores))
-        country_scores.sort(key=lambda x: x[1], reverse=True)
+        # Rank by score (descending), ties keep their original order
+        order = np.argsort(-scores, kind='stable')
+        country_scores = [(country_names[i], score) for i, score in zip(order.tolist(), scores[order].tolist())]
         
         return country_scores
+    
+    @staticmethod
+    def sensitivity_scores(normalized_matrix, weight_vector, variations):
+        """
+        Score every country with each criterion weight varied by each variation
+        Returns array of shape (criteria, variations, countries)
+        """
+        return _sensitivity_scores(np.ascontiguousarray(normalized_matrix, dtype=np.float64),
+                                   np.asarray(weight_vector, dtype=np.float64),
+                                   np.asarray(variations, dtype=np.float64))
 
 # API Routes
 
 @app.route('/', methods=['GET'])
+@app.route('/health', methods=['GET'])
 def home():
     """Health check endpoint"""
     return jsonify({
@@ -159,26 +503,30 @@ def home():
 
 @app.route('/api/countries', methods=['GET'])
 def get_countries():
-    """Get all countries with their criteria values"""
+    """
+    Get all countries with their criteria values
+    
+    Query parameters:
+    - format: rows (default, one object per country) or columns
+      (one array per field, served from the cached country data)
+    """
     try:
-        conn = get_db_connection()
-        countries = conn.execute('SELECT * FROM countries ORDER BY name').fetchall()
-        conn.close()
-        
-        countries_list = []
-        for country in countries:
-            countries_list.append({
-                'id': country['id'],
-                'name': country['name'],
-                'cost_of_living': country['cost_of_living'],
-                'university_ranking': country['university_ranking'],
-                'language_barrier': country['language_barrier'],
-                'visa_difficulty': country['visa_difficulty'],
-                'job_prospects': country['job_prospects'],
-                'climate_score': country['climate_score'],
-                'safety_index': country['safety_index']
+        if request.args.get('format') == 'columns':
+            columns = get_country_columns()
+            return jsonify({
+                'success': True,
+                'countries_columnar': columns,
+                'count': len(columns['id'])
             })
         
+        with db_conn() as conn:
+            # Plain tuples are enough here; skip building sqlite3.Row objects
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            countries = cursor.execute(SELECT_COUNTRIES_SQL).fetchall()
+        
+        countries_list = [dict(zip(COUNTRY_FIELDS, country)) for country in countries]
+        
         return jsonify({
             'success': True,
             'countries': countries_list,
@@ -198,32 +546,26 @@ def add_country():
         data = request.get_json()
         
         # Validate required fields
-        required_fields = ['name', 'cost_of_living', 'university_ranking', 
-                          'language_barrier', 'visa_difficulty', 'job_prospects', 
-                          'climate_score', 'safety_index']
-        
-        for field in required_fields:
+        for field in COUNTRY_VALUE_FIELDS:
             if field not in data:
                 return jsonify({
                     'success': False,
                     'error': f'Missing required field: {field}'
                 }), 400
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO countries (name, cost_of_living, university_ranking, 
-                                 language_barrier, visa_difficulty, job_prospects, 
-                                 climate_score, safety_index)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (data['name'], data['cost_of_living'], data['university_ranking'],
-              data['language_barrier'], data['visa_difficulty'], data['job_prospects'],
-              data['climate_score'], data['safety_index']))
+        with db_conn() as conn:
+            cursor = conn.execute(ADD_COUNTRY_SQL, tuple(data[field] for field in COUNTRY_VALUE_FIELDS))
+            
+            inserted = cursor.rowcount > 0
+            country_id = cursor.lastrowid
+            conn.commit()
         
-        country_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        if not inserted:
+            return jsonify({
+                'success': False,
+                'error': 'Country with this name already exists'
+            }), 409
+        bump_data_version()
         
         return jsonify({
             'success': True,
@@ -252,31 +594,13 @@ def save_preferences():
         session_id = data.get('session_id', 'default_session')
         
         # Default weights
-        weights = {
-            'cost_weight': data.get('cost_weight', 1.0),
-            'ranking_weight': data.get('ranking_weight', 1.0),
-            'language_weight': data.get('language_weight', 1.0),
-            'visa_weight': data.get('visa_weight', 1.0),
-            'job_weight': data.get('job_weight', 1.0),
-            'climate_weight': data.get('climate_weight', 1.0),
-            'safety_weight': data.get('safety_weight', 1.0)
-        }
-        
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO user_preferences 
-            (session_id, cost_weight, ranking_weight, language_weight, 
-             visa_weight, job_weight, climate_weight, safety_weight)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (session_id, weights['cost_weight'], weights['ranking_weight'],
-              weights['language_weight'], weights['visa_weight'], 
-              weights['job_weight'], weights['climate_weight'], weights['safety_weight']))
+        weights = [data.get(name, 1.0) for name in WEIGHT_NAMES]
         
-        preference_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with db_conn() as conn:
+            cursor = conn.execute(INSERT_PREFERENCE_SQL, (session_id, *weights))
+            
+            preference_id = cursor.lastrowid
+            conn.commit()
         
         return jsonify({
             'success': True,
@@ -297,90 +621,37 @@ def analyze_decision():
         data = request.get_json()
         
         # Get user weights
-        weights = {
-            'cost_of_living_weight': data.get('cost_weight', 1.0),
-            'university_ranking_weight': data.get('ranking_weight', 1.0),
-            'language_barrier_weight': data.get('language_weight', 1.0),
-            'visa_difficulty_weight': data.get('visa_weight', 1.0),
-            'job_prospects_weight': data.get('job_weight', 1.0),
-            'climate_score_weight': data.get('climate_weight', 1.0),
-            'safety_index_weight': data.get('safety_weight', 1.0)
-        }
-        
-        # Get countries data
-        conn = get_db_connection()
-        countries = conn.execute('SELECT * FROM countries ORDER BY name').fetchall()
-        conn.close()
-        
-        if not countries:
+        weights = {key: data.get(name, 1.0) for key, name in zip(ANALYSIS_WEIGHT_KEYS, WEIGHT_NAMES)}
+        
+        # Get countries data as a (countries, criteria) matrix
+        country_names, country_matrix = get_country_matrix()
+        
+        if not country_names:
             return jsonify({
                 'success': False,
                 'error': 'No countries found in database'
             }), 404
         
-        # Prepare data for analysis
-        country_data = {
-            'cost_of_living': [],
-            'university_ranking': [],
-            'language_barrier': [],
-            'visa_difficulty': [],
-            'job_prospects': [],
-            'climate_score': [],
-            'safety_index': []
-        }
-        
-        country_names = []
-        
-        for country in countries:
-            country_names.append(country['name'])
-            country_data['cost_of_living'].append(country['cost_of_living'])
-            country_data['university_ranking'].append(country['university_ranking'])
-            country_data['language_barrier'].append(country['language_barrier'])
-            country_data['visa_difficulty'].append(country['visa_difficulty'])
-            country_data['job_prospects'].append(country['job_prospects'])
-            country_data['climate_score'].append(country['climate_score'])
-            country_data['safety_index'].append(country['safety_index'])
-        
-        # Define criteria types (cost or benefit)
-        criteria_types = {
-            'cost_of_living': 'cost',      # Lower is better
-            'university_ranking': 'benefit', # Higher is better
-            'language_barrier': 'cost',     # Lower is better
-            'visa_difficulty': 'cost',      # Lower is better
-            'job_prospects': 'benefit',     # Higher is better
-            'climate_score': 'benefit',     # Higher is better
-            'safety_index': 'benefit'       # Higher is better
-        }
-        
         # Normalize data
         analyzer = DecisionAnalyzer()
-        normalized_data = analyzer.normalize_data(country_data, criteria_types)
+        normalized_matrix = analyzer.normalize_data(country_matrix, COST_MASK)
         
         # Apply SAW algorithm
-        country_scores = analyzer.saw_algorithm(normalized_data, weights, country_names)
-        
-        # Format results
-        results = []
-        for rank, (country_name, score) in enumerate(country_scores, 1):
-            results.append({
-                'rank': rank,
-                'country': country_name,
-                'score': round(score, 4),
-                'percentage': round((score / max([s[1] for s in country_scores])) * 100, 2)
-            })
-        
-        # Save results to database
+        country_scores = analyzer.saw_algorithm(normalized_matrix, weights, country_names)
+        
+        # Format results (scores are sorted descending, so the first is the top score)
+        top_score = country_scores[0][1]
+        percent_scale = 100.0 / top_score if top_score else 0.0
+        results = [{
+            'rank': rank,
+            'country': country_name,
+            'score': round(score, 4),
+            'percentage': round(score * percent_scale, 2)
+        } for rank, (country_name, score) in enumerate(country_scores, 1)]
+        
+        # Save results to database in the background
         session_id = data.get('session_id', 'default_session')
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO decision_results (session_id, country_scores, preferences)
-            VALUES (?, ?, ?)
-        ''', (session_id, json.dumps(results), json.dumps(weights)))
-        
-        conn.commit()
-        conn.close()
+        queue_result(session_id, results, weights)
         
         return jsonify({
             'success': True,
@@ -405,47 +676,39 @@ def sensitivity_analysis():
     try:
         data = request.get_json()
         
-        base_weights = {
-            'cost_weight': data.get('cost_weight', 1.0),
-            'ranking_weight': data.get('ranking_weight', 1.0),
-            'language_weight': data.get('language_weight', 1.0),
-            'visa_weight': data.get('visa_weight', 1.0),
-            'job_weight': data.get('job_weight', 1.0),
-            'climate_weight': data.get('climate_weight', 1.0),
-            'safety_weight': data.get('safety_weight', 1.0)
-        }
+        base_weights = {name: data.get(name, 1.0) for name in WEIGHT_NAMES}
         
-        sensitivity_results = {}
+        # Get countries data as a (countries, criteria) matrix
+        country_names, country_matrix = get_country_matrix()
         
-        # Test each weight by varying it by ±20%
-        for weight_name in base_weights.keys():
-            sensitivity_results[weight_name] = []
-            
-            for variation in [-0.2, -0.1, 0, 0.1, 0.2]:
-                modified_weights = base_weights.copy()
-                modified_weights[weight_name] *= (1 + variation)
-                
-                # Convert to analysis format
-                analysis_weights = {
-                    'cost_of_living_weight': modified_weights['cost_weight'],
-                    'university_ranking_weight': modified_weights['ranking_weight'],
-                    'language_barrier_weight': modified_weights['language_weight'],
-                    'visa_difficulty_weight': modified_weights['visa_weight'],
-                    'job_prospects_weight': modified_weights['job_weight'],
-                    'climate_score_weight': modified_weights['climate_weight'],
-                    'safety_index_weight': modified_weights['safety_weight']
-                }
-                
-                # Run analysis with modified weights
-                # (This would use the same logic as analyze_decision)
-                # For brevity, we'll return the structure
-                
-                sensitivity_results[weight_name].append({
-                    'variation': variation,
-                    'weight_value': modified_weights[weight_name],
-                    'top_country': 'Sample Country',  # Would be calculated
-                    'score_change': variation * 0.1   # Simplified calculation
-                })
+        if not country_names:
+            return jsonify({
+                'success': False,
+                'error': 'No countries found in database'
+            }), 404
+        
+        analyzer = DecisionAnalyzer()
+        normalized_matrix = analyzer.normalize_data(country_matrix, COST_MASK)
+        weight_vector = np.array([base_weights[name] for name in WEIGHT_NAMES], dtype=np.float64)
+        
+        # Test each weight by varying it by ±20%, all re-scorings in one pass
+        variations = np.array(SENSITIVITY_VARIATIONS, dtype=np.float64)
+        scores = analyzer.sensitivity_scores(normalized_matrix, weight_vector, variations)
+        
+        # Track the baseline top country's score under each variation
+        base_scores = normalized_matrix.dot(weight_vector)
+        base_top = int(np.argmax(base_scores))
+        top_indices = scores.argmax(axis=2).tolist()
+        score_changes = np.round(scores[:, :, base_top] - base_scores[base_top], 4).tolist()
+        
+        sensitivity_results = {}
+        for j, weight_name in enumerate(WEIGHT_NAMES):
+            sensitivity_results[weight_name] = [{
+                'variation': variation,
+                'weight_value': base_weights[weight_name] * (1 + variation),
+                'top_country': country_names[top_indices[j][d]],
+                'score_change': score_changes[j][d]
+            } for d, variation in enumerate(SENSITIVITY_VARIATIONS)]
         
         return jsonify({
             'success': True,
@@ -472,21 +735,8 @@ def update_country_data():
                 'error': 'Country ID is required'
             }), 400
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Build update query dynamically
-        update_fields = []
-        update_values = []
-        
-        updatable_fields = ['name', 'cost_of_living', 'university_ranking', 
-                           'language_barrier', 'visa_difficulty', 'job_prospects', 
-                           'climate_score', 'safety_index']
-        
-        for field in updatable_fields:
-            if field in data:
-                update_fields.append(f"{field} = ?")
-                update_values.append(data[field])
+        # Build update query from the fields present
+        update_fields = tuple(field for field in COUNTRY_VALUE_FIELDS if field in data)
         
         if not update_fields:
             return jsonify({
@@ -494,20 +744,20 @@ def update_country_data():
                 'error': 'No valid fields to update'
             }), 400
         
+        update_values = [data[field] for field in update_fields]
         update_values.append(country_id)
-        query = f"UPDATE countries SET {', '.join(update_fields)} WHERE id = ?"
-        
-        cursor.execute(query, update_values)
-        
-        if cursor.rowcount == 0:
-            conn.close()
-            return jsonify({
-                'success': False,
-                'error': 'Country not found'
-            }), 404
         
-        conn.commit()
-        conn.close()
+        with db_conn() as conn:
+            cursor = conn.execute(update_country_sql(update_fields), update_values)
+            
+            if cursor.rowcount == 0:
+                return jsonify({
+                    'success': False,
+                    'error': 'Country not found'
+                }), 404
+            
+            conn.commit()
+        bump_data_version()
         
         return jsonify({
             'success': True,
@@ -535,10 +785,34 @@ def internal_error(error):
         'error': 'Internal server error'
     }), 500
 
-# Initialize database when app starts
+def serve_with_gunicorn(config_path='gunicorn.conf.py'):
+    """Serve this app from prefork gunicorn workers configured by gunicorn.conf.py"""
+    import runpy
+    from gunicorn.app.base import BaseApplication
+    
+    class StandaloneApplication(BaseApplication):
+        def load_config(self):
+            settings = runpy.run_path(config_path)
+            for key, value in settings.items():
+                if key in self.cfg.settings and value is not None:
+                    self.cfg.set(key, value)
+        
+        def load(self):
+            return app
+    
+    StandaloneApplication().run()
+
+# `python app.py --debug` runs the Werkzeug reloader; otherwise serve with gunicorn
 if __name__ == '__main__':
+    import sys
+    
     # Create database tables and sample data
     init_database()
     
-    # Run the Flask application
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    if '--debug' in sys.argv[1:]:
+        app.run(debug=True, host='0.0.0.0', port=5000)
+    else:
+        try:
+            serve_with_gunicorn(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py'))
+        except ImportError:  # gunicorn is unavailable on Windows
+            app.run(host='0.0.0.0', port=5000, threaded=True)
@@ -0,0 +1,15 @@
+"""
+Gunicorn settings for the DSS API.
+Each worker keeps its own SQLite connection pool; threads share it.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Load the app (and initialize the database) once in the master process
+preload_app = True
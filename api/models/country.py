@@ -3,12 +3,102 @@ Country model for the DSS system.
 Handles all country-related data operations and validations.
 """
 
+import logging
+import operator
 import sqlite3
-from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass
-from datetime import datetime
+import threading
+import numpy as np
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Hashable, Iterator, List, Dict, Optional, Tuple
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from models.decision import SQLITE_PRAGMAS, _with_slots
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+# Criteria columns, in decision matrix column order
+CRITERIA = ('cost_of_living', 'university_ranking', 'language_barrier',
+            'visa_difficulty', 'job_prospects', 'climate_score', 'safety_index')
+
+# Columns update_country may change, in the order its SET clauses are built
+UPDATABLE_FIELDS = ('name',) + CRITERIA
+
+# Columns get_countries_paginated may order by
+SORTABLE_FIELDS = ('name',) + CRITERIA
+
+# Reads every criterion off a Country in one call, in CRITERIA order
+_criteria_getter = operator.attrgetter(*CRITERIA)
+
+# Number of cached query results kept per CountryManager
+COUNTRY_CACHE_SIZE = 128
+
+# Rows fetched per round trip when loading every country
+FETCH_CHUNK_SIZE = 256
+
+# Prepared statements kept by sqlite3 per connection; every statement below
+# is passed as the same string each call so it is parsed only once
+STATEMENT_CACHE_SIZE = 256
+
+# Country columns in dataclass field order, for positional construction;
+# SQLite converts created_at to Unix seconds so rows need no Python parsing
+SELECT_COUNTRY_SQL = ("SELECT id, name, %s, CAST(strftime('%%s', created_at) AS INTEGER) FROM countries"
+                      % ', '.join(CRITERIA))
+SELECT_ALL_COUNTRIES_SQL = SELECT_COUNTRY_SQL + ' ORDER BY name'
+SELECT_COUNTRY_BY_ID_SQL = SELECT_COUNTRY_SQL + ' WHERE id = ? LIMIT 1'
+SELECT_COUNTRY_BY_NAME_SQL = SELECT_COUNTRY_SQL + ' WHERE name = ? COLLATE NOCASE LIMIT 1'
+SELECT_MATRIX_SQL = f"SELECT name, {', '.join(CRITERIA)} FROM countries ORDER BY name"
+COUNT_COUNTRIES_SQL = 'SELECT COUNT(*) FROM countries'
+SELECT_NAMES_SQL = 'SELECT name FROM countries ORDER BY name'
+# Row count followed by MIN, MAX, AVG of each criterion, in CRITERIA order
+STATISTICS_SQL = 'SELECT COUNT(*), %s FROM countries' % ', '.join(
+    f'MIN({criterion}), MAX({criterion}), AVG({criterion})' for criterion in CRITERIA)
+NAME_EXISTS_SQL = 'SELECT 1 FROM countries WHERE name = ? COLLATE NOCASE LIMIT 1'
+DELETE_COUNTRY_SQL = 'DELETE FROM countries WHERE id = ?'
+
+INSERT_COUNTRY_SQL = '''
+    INSERT INTO countries (name, cost_of_living, university_ranking, 
+                         language_barrier, visa_difficulty, job_prospects, 
+                         climate_score, safety_index)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT DO NOTHING
+'''
+
+# Insert that skips case-insensitive duplicates when the unique name index is missing
+INSERT_NEW_COUNTRY_SQL = '''
+    INSERT INTO countries (name, cost_of_living, university_ranking, 
+                         language_barrier, visa_difficulty, job_prospects, 
+                         climate_score, safety_index)
+    SELECT ?, ?, ?, ?, ?, ?, ?, ?
+    WHERE NOT EXISTS (SELECT 1 FROM countries WHERE name = ? COLLATE NOCASE)
+'''
+
+
+@lru_cache(maxsize=None)
+def update_country_sql(fields: Tuple[str, ...]) -> str:
+    """UPDATE statement for a tuple of country columns, built once per field set"""
+    return f"UPDATE countries SET {', '.join(field + ' = ?' for field in fields)} WHERE id = ?"
+
+
+@lru_cache(maxsize=None)
+def select_page_sql(sort_by: str, descending: bool) -> str:
+    """Paginated SELECT ordered by one column, ties broken by name as in get_all_countries"""
+    direction = 'DESC' if descending else 'ASC'
+    return f'{SELECT_COUNTRY_SQL} ORDER BY {sort_by} {direction}, name LIMIT ? OFFSET ?'
+
+
+def first_invalid_scores(scores: np.ndarray) -> np.ndarray:
+    """
+    For an (N, len(CRITERIA)) score array, the column of each row's first
+    score outside 0-10 (NaN included), or -1 where the row is valid
+    """
+    invalid = ~((scores >= 0) & (scores <= 10))
+    return np.where(invalid.any(axis=1), invalid.argmax(axis=1), -1)
+
+
+@_with_slots
+@dataclass(frozen=True)
 class Country:
     """Country data class with validation"""
     id: Optional[int] = None
@@ -20,37 +110,62 @@ class Country:
     job_prospects: float = 0.0
     climate_score: float = 0.0
     safety_index: float = 0.0
-    created_at: Optional[datetime] = None
+    created_at: Optional[int] = None  # Unix seconds (UTC)
+    # to_dict result, set on first use; instances are frozen so it never goes stale
+    _dict_cache: Dict = field(init=False, repr=False, compare=False)
+    
+    def score_values(self) -> Tuple:
+        """Criteria values in CRITERIA order"""
+        return _criteria_getter(self)
     
     def validate(self) -> Tuple[bool, str]:
         """Validate country data"""
-        if not self.name or len(self.name.strip()) == 0:
-            return False, "Country name is required"
+        is_valid, message = self.validate_name()
+        if not is_valid:
+            return is_valid, message
         
-        if len(self.name) > 100:
-            return False, "Country name must be less than 100 characters"
+        # Validate score types, then the ranges (0-10) of the numeric prefix
+        values = self.score_values()
+        numeric = len(values)
+        for i, value in enumerate(values):
+            if not isinstance(value, (int, float)):
+                numeric = i
+                break
         
-        # Validate score ranges (0-10)
-        score_fields = [
-            ('cost_of_living', self.cost_of_living),
-            ('university_ranking', self.university_ranking),
-            ('language_barrier', self.language_barrier),
-            ('visa_difficulty', self.visa_difficulty),
-            ('job_prospects', self.job_prospects),
-            ('climate_score', self.climate_score),
-            ('safety_index', self.safety_index)
-        ]
+        column = first_invalid_scores(np.array([values[:numeric]], dtype=np.float64))[0] if numeric else -1
+        if column >= 0:
+            return False, f"{CRITERIA[column]} must be between 0 and 10"
+        if numeric < len(values):
+            return False, f"{CRITERIA[numeric]} must be a number"
         
-        for field_name, value in score_fields:
-            if not isinstance(value, (int, float)):
-                return False, f"{field_name} must be a number"
-            if not (0 <= value <= 10):
-                return False, f"{field_name} must be between 0 and 10"
+        return True, "Valid"
+    
+    def validate_name(self) -> Tuple[bool, str]:
+        """Validate the country name"""
+        return self.check_name(self.name)
+    
+    @staticmethod
+    def check_name(name: Optional[str]) -> Tuple[bool, str]:
+        """Validate a country name"""
+        if not name or len(name.strip()) == 0:
+            return False, "Country name is required"
+        
+        if len(name) > 100:
+            return False, "Country name must be less than 100 characters"
         
         return True, "Valid"
     
     def to_dict(self) -> Dict:
-        """Convert country to dictionary"""
+        """Convert country to dictionary (a fresh copy of the cached one)"""
+        try:
+            cached = self._dict_cache
+        except AttributeError:
+            cached = self._build_dict()
+            object.__setattr__(self, '_dict_cache', cached)
+        return cached.copy()
+    
+    def _build_dict(self) -> Dict:
+        """Build the dictionary form, including the ISO created_at"""
         return {
             'id': self.id,
             'name': self.name,
@@ -61,116 +176,230 @@ class Country:
             'job_prospects': self.job_prospects,
             'climate_score': self.climate_score,
             'safety_index': self.safety_index,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_dt.isoformat() if self.created_at is not None else None
         }
     
+    @property
+    def created_dt(self) -> Optional[datetime]:
+        """created_at as a naive UTC datetime, converted on access"""
+        if self.created_at is None:
+            return None
+        return datetime.fromtimestamp(self.created_at, timezone.utc).replace(tzinfo=None)
+    
+    @classmethod
+    def from_row(cls, row: Tuple) -> 'Country':
+        """Create country from a SELECT_COUNTRY_SQL row tuple"""
+        return cls(*row)
+    
     @classmethod
     def from_dict(cls, data: Dict) -> 'Country':
         """Create country from dictionary"""
-        return cls(
-            id=data.get('id'),
-            name=data.get('name', ''),
-            cost_of_living=float(data.get('cost_of_living', 0)),
-            university_ranking=float(data.get('university_ranking', 0)),
-            language_barrier=float(data.get('language_barrier', 0)),
-            visa_difficulty=float(data.get('visa_difficulty', 0)),
-            job_prospects=float(data.get('job_prospects', 0)),
-            climate_score=float(data.get('climate_score', 0)),
-            safety_index=float(data.get('safety_index', 0))
-        )
+        scores = tuple(float(data.get(criterion, 0)) for criterion in CRITERIA)
+        return cls(data.get('id'), data.get('name', ''), *scores)
 
 
 class CountryManager:
     """Manages country data operations"""
     
+    # Mutation counters per database, shared by every manager in the process
+    _versions: Dict[str, int] = {}
+    _versions_lock = threading.Lock()
+    
     def __init__(self, db_path: str = 'dss.db'):
         self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        self._unique_nocase = False
+        self._cache: 'OrderedDict[Hashable, Tuple[Tuple[int, int], Any]]' = OrderedDict()
+    
+    @property
+    def version(self) -> int:
+        """Counter bumped whenever countries are added, updated or deleted"""
+        return CountryManager._versions.get(self.db_path, 0)
+    
+    def _bump_version(self) -> None:
+        """Invalidate caches built from the countries table"""
+        with CountryManager._versions_lock:
+            CountryManager._versions[self.db_path] = self.version + 1
+    
+    def data_stamp(self) -> Tuple[int, int]:
+        """
+        Identify the current state of the data: the in-process version covers
+        writes through any manager here, PRAGMA data_version covers commits
+        by other connections (other processes or the legacy app)
+        """
+        data_version = self._fetchone('PRAGMA data_version')[0]
+        return self.version, data_version
+    
+    def _cached(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached result for key while the data is unchanged, else load it (LRU)"""
+        stamp = self.data_stamp()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._cache.move_to_end(key)
+                return entry[1]
+        
+        value = loader()
+        with self._lock:
+            self._cache[key] = (stamp, value)
+            self._cache.move_to_end(key)
+            while len(self._cache) > COUNTRY_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return value
     
     def get_connection(self) -> sqlite3.Connection:
-        """Create database connection"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        """
+        Persistent connection shared by this manager's methods, opened on
+        first use. Callers must hold self._lock while using it.
+        """
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None,
+                                   cached_statements=STATEMENT_CACHE_SIZE)
+            conn.row_factory = sqlite3.Row
+            for pragma in SQLITE_PRAGMAS:
+                conn.execute(pragma)
+            self._unique_nocase = self._ensure_unique_nocase(conn)
+            self._conn = conn
+        return self._conn
+    
+    @staticmethod
+    def _ensure_unique_nocase(conn: sqlite3.Connection) -> bool:
+        """
+        Enforce case-insensitive unique names with an index, so inserts can
+        detect duplicates themselves; False if existing rows prevent it
+        """
+        try:
+            conn.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS ux_countries_name_nocase
+                ON countries(name COLLATE NOCASE)
+            ''')
+            return True
+        except sqlite3.Error as e:
+            logger.warning(f"Could not create case-insensitive country name index: {str(e)}")
+            return False
+    
+    def _fetchall(self, query: str, params: Tuple = ()) -> List[sqlite3.Row]:
+        """Run a read query on the shared connection and return all rows"""
+        with self._lock:
+            return self.get_connection().execute(query, params).fetchall()
+    
+    def _fetchone(self, query: str, params: Tuple = ()) -> Optional[sqlite3.Row]:
+        """Run a read query on the shared connection and return the first row"""
+        with self._lock:
+            return self.get_connection().execute(query, params).fetchone()
+    
+    def _tuple_cursor(self) -> sqlite3.Cursor:
+        """Cursor on the shared connection returning plain tuples; hold self._lock while using it"""
+        cursor = self.get_connection().cursor()
+        cursor.row_factory = None
+        return cursor
+    
+    @contextmanager
+    def _transaction(self, immediate: bool = False) -> Iterator[sqlite3.Connection]:
+        """
+        Hold the shared connection for one BEGIN ... COMMIT, rolling back on
+        error; immediate takes the write lock up front
+        """
+        with self._lock:
+            conn = self.get_connection()
+            conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+            try:
+                yield conn
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
     
     def get_all_countries(self) -> List[Country]:
         """Retrieve all countries from database"""
+        # Callers may sort or slice the list, so hand out a copy
+        return list(self._cached('all', self._load_all_countries))
+    
+    def _load_all_countries(self) -> List[Country]:
+        """Query all countries ordered by name"""
         try:
-            conn = self.get_connection()
-            cursor = conn.execute('SELECT * FROM countries ORDER BY name')
-            rows = cursor.fetchall()
-            conn.close()
-            
             countries = []
-            for row in rows:
-                country = Country(
-                    id=row['id'],
-                    name=row['name'],
-                    cost_of_living=row['cost_of_living'],
-                    university_ranking=row['university_ranking'],
-                    language_barrier=row['language_barrier'],
-                    visa_difficulty=row['visa_difficulty'],
-                    job_prospects=row['job_prospects'],
-                    climate_score=row['climate_score'],
-                    safety_index=row['safety_index'],
-                    created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None
-                )
-                countries.append(country)
+            with self._lock:
+                cursor = self._tuple_cursor().execute(SELECT_ALL_COUNTRIES_SQL)
+                cursor.arraysize = FETCH_CHUNK_SIZE
+                
+                # Build Country objects chunk by chunk instead of holding every row first
+                while True:
+                    rows = cursor.fetchmany()
+                    if not rows:
+                        break
+                    countries.extend(map(Country.from_row, rows))
             
             return countries
             
         except Exception as e:
             raise Exception(f"Error retrieving countries: {str(e)}")
     
+    def get_countries_paginated(self, sort_by: str = 'name', descending: bool = False,
+                                limit: Optional[int] = None, offset: int = 0) -> List[Country]:
+        """
+        Retrieve one page of countries sorted in SQL, so only the requested
+        slice is materialized; limit None returns everything after offset
+        """
+        if sort_by not in SORTABLE_FIELDS:
+            raise ValueError(f"Cannot sort countries by {sort_by}")
+        
+        key = ('page', sort_by, descending, limit, offset)
+        return list(self._cached(key, lambda: self._load_countries_page(sort_by, descending, limit, offset)))
+    
+    def _load_countries_page(self, sort_by: str, descending: bool,
+                             limit: Optional[int], offset: int) -> List[Country]:
+        """Query one sorted page of countries"""
+        try:
+            # LIMIT -1 means no limit in SQLite
+            params = (-1 if limit is None else limit, offset)
+            with self._lock:
+                rows = self._tuple_cursor().execute(select_page_sql(sort_by, descending), params).fetchall()
+            
+            return list(map(Country.from_row, rows))
+            
+        except Exception as e:
+            raise Exception(f"Error retrieving countries: {str(e)}")
+    
+    def count_countries(self) -> int:
+        """Count countries in database without loading them"""
+        return self._cached('count', self._load_count)
+    
+    def _load_count(self) -> int:
+        """Query the number of countries"""
+        try:
+            return self._fetchone(COUNT_COUNTRIES_SQL)[0]
+            
+        except Exception as e:
+            raise Exception(f"Error counting countries: {str(e)}")
+    
     def get_country_by_id(self, country_id: int) -> Optional[Country]:
         """Get country by ID"""
+        return self._cached(('id', country_id), lambda: self._load_country_by_id(country_id))
+    
+    def _load_country_by_id(self, country_id: int) -> Optional[Country]:
+        """Query a country by ID"""
         try:
-            conn = self.get_connection()
-            cursor = conn.execute('SELECT * FROM countries WHERE id = ?', (country_id,))
-            row = cursor.fetchone()
-            conn.close()
-            
-            if not row:
-                return None
+            with self._lock:
+                row = self._tuple_cursor().execute(SELECT_COUNTRY_BY_ID_SQL, (country_id,)).fetchone()
             
-            return Country(
-                id=row['id'],
-                name=row['name'],
-                cost_of_living=row['cost_of_living'],
-                university_ranking=row['university_ranking'],
-                language_barrier=row['language_barrier'],
-                visa_difficulty=row['visa_difficulty'],
-                job_prospects=row['job_prospects'],
-                climate_score=row['climate_score'],
-                safety_index=row['safety_index'],
-                created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None
-            )
+            return Country.from_row(row) if row else None
             
         except Exception as e:
             raise Exception(f"Error retrieving country: {str(e)}")
     
     def get_country_by_name(self, name: str) -> Optional[Country]:
         """Get country by name"""
+        return self._cached(('name', name.lower()), lambda: self._load_country_by_name(name))
+    
+    def _load_country_by_name(self, name: str) -> Optional[Country]:
+        """Query a country by case-insensitive name"""
         try:
-            conn = self.get_connection()
-            cursor = conn.execute('SELECT * FROM countries WHERE LOWER(name) = LOWER(?)', (name,))
-            row = cursor.fetchone()
-            conn.close()
-            
-            if not row:
-                return None
+            with self._lock:
+                row = self._tuple_cursor().execute(SELECT_COUNTRY_BY_NAME_SQL, (name,)).fetchone()
             
-            return Country(
-                id=row['id'],
-                name=row['name'],
-                cost_of_living=row['cost_of_living'],
-                university_ranking=row['university_ranking'],
-                language_barrier=row['language_barrier'],
-                visa_difficulty=row['visa_difficulty'],
-                job_prospects=row['job_prospects'],
-                climate_score=row['climate_score'],
-                safety_index=row['safety_index'],
-                created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None
-            )
+            return Country.from_row(row) if row else None
             
         except Exception as e:
             raise Exception(f"Error retrieving country by name: {str(e)}")
@@ -182,155 +411,239 @@ class CountryManager:
         if not is_valid:
             raise ValueError(f"Invalid country data: {message}")
         
-        # Check if country already exists
-        existing = self.get_country_by_name(country.name)
-        if existing:
+        try:
+            with self._transaction() as conn:
+                # Without the unique name index, look for duplicates first
+                if not self._unique_nocase and self._name_exists(conn, country.name):
+                    inserted = False
+                else:
+                    cursor = conn.execute(INSERT_COUNTRY_SQL, (country.name, *country.score_values()))
+                    inserted = cursor.rowcount > 0
+                    country_id = cursor.lastrowid
+        except Exception as e:
+            raise Exception(f"Error adding country: {str(e)}")
+        
+        if not inserted:
             raise ValueError(f"Country '{country.name}' already exists")
+        self._bump_version()
         
+        return country_id
+    
+    @staticmethod
+    def _name_exists(conn: sqlite3.Connection, name: str) -> bool:
+        """Check for a country with the same name, ignoring case"""
+        return conn.execute(NAME_EXISTS_SQL, (name,)).fetchone() is not None
+    
+    def add_countries(self, countries: List[Country]) -> List[Tuple[Optional[int], Optional[str]]]:
+        """
+        Add several countries over one connection in a single transaction.
+        Returns (country_id, None) for each added country and (None, error)
+        for each rejected one, in input order.
+        """
+        errors = self._validate_batch(countries)
+        
+        results = []
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
+            with self._transaction() as conn:
+                for country, message in zip(countries, errors):
+                    if message is not None:
+                        results.append((None, f"Invalid country data: {message}"))
+                        continue
+                    
+                    # Rows added earlier in this batch count as duplicates too
+                    if not self._unique_nocase and self._name_exists(conn, country.name):
+                        cursor = None
+                    else:
+                        cursor = conn.execute(INSERT_COUNTRY_SQL, (country.name, *country.score_values()))
+                    if cursor is None or cursor.rowcount == 0:
+                        results.append((None, f"Country '{country.name}' already exists"))
+                        continue
+                    results.append((cursor.lastrowid, None))
             
-            cursor.execute('''
-                INSERT INTO countries (name, cost_of_living, university_ranking, 
-                                     language_barrier, visa_difficulty, job_prospects, 
-                                     climate_score, safety_index)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (country.name, country.cost_of_living, country.university_ranking,
-                  country.language_barrier, country.visa_difficulty, country.job_prospects,
-                  country.climate_score, country.safety_index))
+            if any(country_id is not None for country_id, _ in results):
+                self._bump_version()
             
-            country_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
-            
-            return country_id
+            return results
             
         except Exception as e:
-            raise Exception(f"Error adding country: {str(e)}")
+            raise Exception(f"Error adding countries: {str(e)}")
+    
+    def import_countries(self, countries: List[Country]) -> int:
+        """
+        Bulk-load countries with one executemany in a single BEGIN IMMEDIATE
+        transaction. The whole batch is rejected with a ValueError if any
+        country is invalid; names that already exist are skipped.
+        Returns the number of countries inserted.
+        """
+        for i, message in enumerate(self._validate_batch(countries)):
+            if message is not None:
+                raise ValueError(f"Invalid country data at index {i}: {message}")
+        
+        try:
+            with self._transaction(immediate=True) as conn:
+                if self._unique_nocase:
+                    rows = [(country.name, *country.score_values()) for country in countries]
+                    inserted = conn.executemany(INSERT_COUNTRY_SQL, rows).rowcount
+                else:
+                    rows = [(country.name, *country.score_values(), country.name) for country in countries]
+                    inserted = conn.executemany(INSERT_NEW_COUNTRY_SQL, rows).rowcount
+        except Exception as e:
+            raise Exception(f"Error importing countries: {str(e)}")
+        
+        if inserted > 0:
+            self._bump_version()
+        
+        return inserted
+    
+    @staticmethod
+    def _validate_batch(countries: List[Country]) -> List[Optional[str]]:
+        """Validation error for each country (None if valid), range-checking all numeric scores in one pass"""
+        numeric = [i for i, country in enumerate(countries)
+                   if all(isinstance(value, (int, float)) for value in country.score_values())]
+        invalid_columns = np.full(len(countries), -1)
+        if numeric:
+            scores = np.array([countries[i].score_values() for i in numeric], dtype=np.float64)
+            invalid_columns[numeric] = first_invalid_scores(scores)
+        numeric = set(numeric)
+        
+        errors = []
+        for i, country in enumerate(countries):
+            # A malformed row (e.g. a non-string name) is reported against that row only
+            try:
+                if i in numeric:
+                    is_valid, message = country.validate_name()
+                    if is_valid and invalid_columns[i] >= 0:
+                        is_valid, message = False, f"{CRITERIA[invalid_columns[i]]} must be between 0 and 10"
+                else:
+                    is_valid, message = country.validate()
+            except Exception as e:
+                is_valid, message = False, str(e)
+            errors.append(None if is_valid else message)
+        
+        return errors
     
     def update_country(self, country_id: int, updates: Dict) -> bool:
         """Update existing country"""
-        existing_country = self.get_country_by_id(country_id)
-        if not existing_country:
-            raise ValueError(f"Country with ID {country_id} not found")
+        # The call shape (updatable fields present, in canonical order) keys the cached SQL
+        update_fields = tuple(field for field in UPDATABLE_FIELDS if field in updates)
+        if not update_fields:
+            return False
         
-        # Create updated country object for validation
-        country_data = existing_country.to_dict()
-        country_data.update(updates)
-        updated_country = Country.from_dict(country_data)
+        # Validate only the fields being changed
+        update_values = [updates[field] if field == 'name' else float(updates[field]) for field in update_fields]
+        for field, value in zip(update_fields, update_values):
+            if field == 'name':
+                is_valid, message = Country.check_name(value)
+                if not is_valid:
+                    raise ValueError(f"Invalid update data: {message}")
+            elif not (0 <= value <= 10):
+                raise ValueError(f"Invalid update data: {field} must be between 0 and 10")
         
-        # Validate updated data
-        is_valid, message = updated_country.validate()
-        if not is_valid:
-            raise ValueError(f"Invalid update data: {message}")
+        update_values.append(country_id)
+        query = update_country_sql(update_fields)
         
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            # Build update query dynamically
-            update_fields = []
-            update_values = []
-            
-            updatable_fields = ['name', 'cost_of_living', 'university_ranking', 
-                               'language_barrier', 'visa_difficulty', 'job_prospects', 
-                               'climate_score', 'safety_index']
-            
-            for field in updatable_fields:
-                if field in updates:
-                    update_fields.append(f"{field} = ?")
-                    update_values.append(updates[field])
-            
-            if not update_fields:
-                return False
-            
-            update_values.append(country_id)
-            query = f"UPDATE countries SET {', '.join(update_fields)} WHERE id = ?"
-            
-            cursor.execute(query, update_values)
-            rows_affected = cursor.rowcount
-            conn.commit()
-            conn.close()
-            
-            return rows_affected > 0
-            
+            with self._transaction() as conn:
+                rows_affected = conn.execute(query, update_values).rowcount
         except Exception as e:
             raise Exception(f"Error updating country: {str(e)}")
+        
+        # The UPDATE itself tells us whether the country exists
+        if rows_affected == 0:
+            raise ValueError(f"Country with ID {country_id} not found")
+        self._bump_version()
+        
+        return True
     
     def delete_country(self, country_id: int) -> bool:
         """Delete country from database"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute('DELETE FROM countries WHERE id = ?', (country_id,))
-            rows_affected = cursor.rowcount
-            conn.commit()
-            conn.close()
+            with self._transaction() as conn:
+                rows_affected = conn.execute(DELETE_COUNTRY_SQL, (country_id,)).rowcount
+            if rows_affected > 0:
+                self._bump_version()
             
             return rows_affected > 0
             
         except Exception as e:
             raise Exception(f"Error deleting country: {str(e)}")
     
+    def _load_matrix(self) -> Tuple[List[str], np.ndarray]:
+        """Load country names and an (N, len(CRITERIA)) criteria matrix, ordered by name"""
+        try:
+            rows = self._fetchall(SELECT_MATRIX_SQL)
+        except Exception as e:
+            raise Exception(f"Error retrieving countries: {str(e)}")
+        
+        names = [row[0] for row in rows]
+        matrix = np.array([tuple(row)[1:] for row in rows], dtype=np.float64).reshape(len(rows), len(CRITERIA))
+        return names, matrix
+    
+    def get_country_matrix(self) -> Tuple[List[str], np.ndarray]:
+        """
+        Country names and one contiguous (N, len(CRITERIA)) float64 slab of their
+        criteria, in the same name order as get_all_countries. Shared through
+        the cache, so the matrix is read-only; copy it before modifying.
+        """
+        return self._cached('matrix', self._load_shared_matrix)
+    
+    def _load_shared_matrix(self) -> Tuple[List[str], np.ndarray]:
+        """Load the criteria matrix and freeze it for sharing between callers"""
+        names, matrix = self._load_matrix()
+        matrix.flags.writeable = False
+        return tuple(names), matrix
+    
     def get_countries_data_for_analysis(self) -> Dict[str, List[float]]:
         """Get countries data formatted for decision analysis"""
-        countries = self.get_all_countries()
+        country_names, columns = self._cached('analysis_data', self._load_analysis_data)
         
-        if not countries:
+        if not country_names:
             raise Exception("No countries available for analysis")
         
-        data = {
-            'cost_of_living': [],
-            'university_ranking': [],
-            'language_barrier': [],
-            'visa_difficulty': [],
-            'job_prospects': [],
-            'climate_score': [],
-            'safety_index': []
-        }
-        
-        country_names = []
-        
-        for country in countries:
-            country_names.append(country.name)
-            data['cost_of_living'].append(country.cost_of_living)
-            data['university_ranking'].append(country.university_ranking)
-            data['language_barrier'].append(country.language_barrier)
-            data['visa_difficulty'].append(country.visa_difficulty)
-            data['job_prospects'].append(country.job_prospects)
-            data['climate_score'].append(country.climate_score)
-            data['safety_index'].append(country.safety_index)
+        # Callers get their own lists; copying shares the cached float objects
+        data = {criterion: list(column) for criterion, column in columns.items()}
         
-        return data, country_names
+        return data, list(country_names)
     
-    def get_statistics(self) -> Dict:
-        """Get statistics about countries in database"""
-        countries = self.get_all_countries()
-        
-        if not countries:
-            return {
-                'total_countries': 0,
-                'statistics': {}
+    def _load_analysis_data(self) -> Tuple[Tuple[str, ...], Dict[str, Tuple[float, ...]]]:
+        """Split the shared criteria matrix into immutable per-criterion columns"""
+        country_names, matrix = self.get_country_matrix()
+        columns = {criterion: tuple(column.tolist()) for criterion, column in zip(CRITERIA, matrix.T)}
+        return country_names, columns
+    
+    def get_statistics(self, include_names: bool = False) -> Dict:
+        """Get statistics about countries in database, optionally with the sorted country names"""
+        return self._cached(('statistics', include_names), lambda: self._load_statistics(include_names))
+    
+    def _load_statistics(self, include_names: bool) -> Dict:
+        """Aggregate statistics about countries inside SQLite"""
+        try:
+            row = self._fetchone(STATISTICS_SQL)
+            count = row[0]
+            if not count:
+                return {
+                    'total_countries': 0,
+                    'statistics': {}
+                }
+            
+            stats = {
+                criterion: {
+                    'min': row[1 + 3 * i],
+                    'max': row[2 + 3 * i],
+                    'avg': row[3 + 3 * i],
+                    'count': count
+                }
+                for i, criterion in enumerate(CRITERIA)
             }
-        
-        # Calculate statistics for each criterion
-        criteria = ['cost_of_living', 'university_ranking', 'language_barrier',
-                   'visa_difficulty', 'job_prospects', 'climate_score', 'safety_index']
-        
-        stats = {}
-        for criterion in criteria:
-            values = [getattr(country, criterion) for country in countries]
-            stats[criterion] = {
-                'min': min(values),
-                'max': max(values),
-                'avg': sum(values) / len(values),
-                'count': len(values)
+            
+            result = {
+                'total_countries': count,
+                'statistics': stats
             }
-        
-        return {
-            'total_countries': len(countries),
-            'statistics': stats,
-            'countries_list': [country.name for country in countries]
-        }
+            if include_names:
+                result['countries_list'] = [name for name, in self._fetchall(SELECT_NAMES_SQL)]
+            
+            return result
+            
+        except Exception as e:
+            raise Exception(f"Error computing statistics: {str(e)}")
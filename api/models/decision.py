@@ -4,13 +4,91 @@ Implements various MCDM (Multi-Criteria Decision Making) methods.
 """
 
 import numpy as np
+import operator
 import sqlite3
 import json
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass
+import atexit
+import hashlib
+import logging
+import queue
+import threading
+import time
+from typing import Dict, List, Sequence, Tuple, Optional
+from collections import OrderedDict
+from dataclasses import dataclass, fields
 from datetime import datetime
 from enum import Enum
 
+try:
+    import orjson
+except ImportError:  # orjson is an optional accelerator
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Normalized matrices and analysis results memoized per SAWAnalyzer, keyed on data content
+SAW_CACHE_SIZE = 8
+
+# Sweep and baseline scores come from different products (matrix vs vector), so
+# both are rounded to this many decimals before their orderings are compared
+SWEEP_RANK_DECIMALS = 10
+
+# Background persistence of analysis results: queue bound, rows per transaction
+# and max wait per batch
+RESULT_QUEUE_SIZE = 1000
+RESULT_BATCH_SIZE = 200
+RESULT_FLUSH_INTERVAL = 0.5
+
+# Applied to every connection: WAL lets readers run alongside the result writer,
+# and a 64 MB page cache plus mmap keeps the analytics working set in memory.
+# The page cache is per connection, so each open manager connection may hold up
+# to 64 MB; the mmap window is shared OS page cache and only touched pages count.
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-65536',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA temp_store=MEMORY',
+)
+
+def dumps_json(obj) -> str:
+    """Serialize obj to a JSON string, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(obj)
+
+
+# orjson.loads accepts the same str input and returns the same types
+loads_json = orjson.loads if orjson is not None else json.loads
+
+
+INSERT_PREFERENCES_SQL = '''
+    INSERT INTO user_preferences 
+    (session_id, cost_weight, ranking_weight, language_weight, 
+     visa_weight, job_weight, climate_weight, safety_weight)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Session lookups read newest-first; these let SQLite seek to the session and
+# walk the index in order instead of sorting every row for the session
+SESSION_INDEXES = (
+    '''CREATE INDEX IF NOT EXISTS idx_up_session_created
+       ON user_preferences(session_id, created_at)''',
+    '''CREATE INDEX IF NOT EXISTS idx_dr_session_created
+       ON decision_results(session_id, created_at, id)''',
+)
+
+INSERT_RESULT_SQL = '''
+    INSERT INTO decision_results (session_id, country_scores, preferences)
+    VALUES (?, ?, ?)
+'''
+
+def _sweep_scores_numpy(w_sweep: np.ndarray, q: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Scores for every sweep row as one (R, C) @ (C, N) product rounded for ranking, plus each row's top country"""
+    scores = np.round(w_sweep @ q, SWEEP_RANK_DECIMALS)
+    return scores, scores.argmax(axis=1)
+
+
 class CriteriaType(Enum):
     """Types of criteria for decision analysis"""
     BENEFIT = "benefit"  # Higher values are better
@@ -38,8 +116,39 @@ class DecisionResult:
     score: float
     rank: int
     percentage: float
-    criteria_scores: Dict[str, float]
+    criteria_scores_row: np.ndarray  # weighted score per criterion, aligned with criteria_order
+    criteria_order: Sequence[str]    # shared by every result of one analysis
+    
+    @property
+    def criteria_scores(self) -> Dict[str, float]:
+        """Weighted score per criterion as a dict, built on access"""
+        return dict(zip(self.criteria_order, self.criteria_scores_row.tolist()))
+
+# UserPreferences weight fields, in criteria order
+WEIGHT_FIELDS = ('cost_weight', 'ranking_weight', 'language_weight', 'visa_weight',
+                 'job_weight', 'climate_weight', 'safety_weight')
+
+# Reads every weight off a UserPreferences in one call, in WEIGHT_FIELDS order
+_weights_getter = operator.attrgetter(*WEIGHT_FIELDS)
+
+# Largest allowed preference weight
+MAX_WEIGHT = 10
+
+# Analysis weight keys aligned with WEIGHT_FIELDS
+ANALYSIS_WEIGHT_KEYS = ('cost_of_living_weight', 'university_ranking_weight', 'language_barrier_weight',
+                        'visa_difficulty_weight', 'job_prospects_weight', 'climate_score_weight',
+                        'safety_index_weight')
+
 
+def _with_slots(cls):
+    """Rebuild a dataclass with __slots__ and no __dict__ (dataclass(slots=True) needs Python 3.10)"""
+    names = tuple(field.name for field in fields(cls))
+    namespace = {key: value for key, value in cls.__dict__.items()
+                 if key not in names and key not in ('__dict__', '__weakref__')}
+    namespace['__slots__'] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+@_with_slots
 @dataclass
 class UserPreferences:
     """User preference weights for decision criteria"""
@@ -58,68 +167,78 @@ class UserPreferences:
         if not self.session_id:
             return False, "Session ID is required"
         
-        weights = [self.cost_weight, self.ranking_weight, self.language_weight,
-                  self.visa_weight, self.job_weight, self.climate_weight, 
-                  self.safety_weight]
+        weights = self.weights()
+        
+        # Fast path: all numeric (strings or None give a non-numeric dtype) and in range
+        try:
+            values = np.array(weights)
+        except (TypeError, ValueError):  # ragged input such as a list weight
+            values = None
+        if values is not None and values.dtype.kind in 'biuf' and self.validate_array(values):
+            return True, "Valid"
         
+        # Slow path finds the first offending weight for the error message
         for i, weight in enumerate(weights):
             if not isinstance(weight, (int, float)):
                 return False, f"Weight {i+1} must be a number"
             if weight < 0:
                 return False, f"Weight {i+1} cannot be negative"
-            if weight > 10:
-                return False, f"Weight {i+1} cannot exceed 10"
+            if weight > MAX_WEIGHT:
+                return False, f"Weight {i+1} cannot exceed {MAX_WEIGHT}"
         
         return True, "Valid"
     
+    def weights(self) -> Tuple:
+        """Weights in WEIGHT_FIELDS order"""
+        return _weights_getter(self)
+    
+    @staticmethod
+    def validate_array(weights: np.ndarray) -> bool:
+        """True if every weight in a numeric array (any shape) is within 0-MAX_WEIGHT"""
+        return bool(((weights >= 0) & (weights <= MAX_WEIGHT)).all())
+    
     def to_analysis_weights(self) -> Dict[str, float]:
         """Convert to format used by analysis algorithms"""
-        return {
-            'cost_of_living_weight': self.cost_weight,
-            'university_ranking_weight': self.ranking_weight,
-            'language_barrier_weight': self.language_weight,
-            'visa_difficulty_weight': self.visa_weight,
-            'job_prospects_weight': self.job_weight,
-            'climate_score_weight': self.climate_weight,
-            'safety_index_weight': self.safety_weight
-        }
+        return dict(zip(ANALYSIS_WEIGHT_KEYS, self.weights()))
 
 
 class DataNormalizer:
     """Handles data normalization for decision analysis"""
     
     @staticmethod
-    def min_max_normalize(values: List[float], criteria_type: CriteriaType) -> List[float]:
+    def min_max_normalize(values: np.ndarray, criteria_type: CriteriaType) -> np.ndarray:
         """
         Min-Max normalization for a single criterion
         
         Args:
-            values: List of values to normalize
+            values: 1-D array of values to normalize
             criteria_type: Whether higher or lower values are better
         
         Returns:
-            List of normalized values between 0 and 1
+            Array of normalized values between 0 and 1
         """
-        if not values:
-            return []
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            return values
         
-        min_val = min(values)
-        max_val = max(values)
+        min_val = values.min()
+        max_val = values.max()
+        value_range = max_val - min_val
         
         # Handle case where all values are the same
-        if max_val == min_val:
-            return [1.0] * len(values)
+        if value_range == 0:
+            return np.ones_like(values)
         
         if criteria_type == CriteriaType.COST:
             # For cost criteria, lower is better (inverse normalization)
-            return [(max_val - val) / (max_val - min_val) for val in values]
+            return (max_val - values) / value_range
         else:
             # For benefit criteria, higher is better
-            return [(val - min_val) / (max_val - min_val) for val in values]
+            return (values - min_val) / value_range
     
     @staticmethod
     def normalize_dataset(data: Dict[str, List[float]], 
-                         criteria_types: Dict[str, CriteriaType]) -> Dict[str, List[float]]:
+                         criteria_types: Dict[str, CriteriaType]) -> Dict[str, np.ndarray]:
         """
         Normalize entire dataset
         
@@ -128,7 +247,7 @@ class DataNormalizer:
             criteria_types: Dictionary mapping criterion names to their types
         
         Returns:
-            Dictionary with normalized values
+            Dictionary with normalized value arrays
         """
         normalized = {}
         
@@ -137,7 +256,7 @@ class DataNormalizer:
                 raise ValueError(f"Criteria type not defined for {criterion}")
             
             normalized[criterion] = DataNormalizer.min_max_normalize(
-                values, criteria_types[criterion]
+                np.asarray(values, dtype=np.float64), criteria_types[criterion]
             )
         
         return normalized
@@ -156,6 +275,13 @@ class SAWAnalyzer:
             'climate_score': CriteriaType.BENEFIT,
             'safety_index': CriteriaType.BENEFIT
         }
+        # Criteria type resolved once into a cost mask, so normalization needs no per-criterion branch
+        self._criteria_index = {criterion: i for i, criterion in enumerate(self.criteria_types)}
+        self._is_cost = np.array([criteria_type == CriteriaType.COST
+                                  for criteria_type in self.criteria_types.values()], dtype=bool)
+        self._normalized_cache = OrderedDict()
+        self._results_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
     
     def analyze(self, data: Dict[str, List[float]], 
                 weights: Dict[str, float], 
@@ -174,54 +300,120 @@ class SAWAnalyzer:
         if not data or not weights or not country_names:
             raise ValueError("Data, weights, and country names are required")
         
-        num_countries = len(country_names)
-        if num_countries == 0:
-            return []
+        criteria_order, x, data_key = self._stack(data, weights, len(country_names))
+        
+        # Repeated requests (e.g. re-submitting the same sliders) reuse the ranked results
+        results_key = (data_key, tuple(sorted(weights.items())), tuple(country_names))
+        results = self._cache_get(self._results_cache, results_key)
+        if results is None:
+            q = self._normalized(criteria_order, x, data_key)
+            w = self._weight_vector(criteria_order, weights)
+            results = self._rank(country_names, criteria_order, q, w, self._score(q, w))
+            self._cache_put(self._results_cache, results_key, results)
         
+        return list(results)
+    
+    def _normalize(self, data: Dict[str, List[float]], weights: Dict[str, float],
+                   num_countries: int) -> Tuple[List[str], np.ndarray]:
+        """
+        Validate and normalize the data once, independent of weight values
+        
+        Returns:
+            The weighted criteria, in data order, and their (C, N) normalized
+            matrix, which is shared through the cache and read-only
+        """
+        criteria_order, x, data_key = self._stack(data, weights, num_countries)
+        return criteria_order, self._normalized(criteria_order, x, data_key)
+    
+    def _stack(self, data: Dict[str, List[float]], weights: Dict[str, float],
+               num_countries: int) -> Tuple[List[str], np.ndarray, Tuple]:
+        """Validate the data and stack the weighted criteria into a (C, N) array plus its content key"""
         # Validate data consistency
         for criterion, values in data.items():
             if len(values) != num_countries:
                 raise ValueError(f"Data length mismatch for criterion {criterion}")
+            if criterion not in self._criteria_index:
+                raise ValueError(f"Criteria type not defined for {criterion}")
         
-        # Normalize data
-        normalized_data = DataNormalizer.normalize_dataset(data, self.criteria_types)
-        
-        # Calculate weighted scores
-        results = []
-        for i in range(num_countries):
-            score = 0
-            criteria_scores = {}
-            
-            for criterion, norm_values in normalized_data.items():
-                weight_key = criterion + '_weight'
-                if weight_key in weights:
-                    weighted_score = weights[weight_key] * norm_values[i]
-                    score += weighted_score
-                    criteria_scores[criterion] = weighted_score
-            
-            results.append({
-                'country': country_names[i],
-                'score': score,
-                'criteria_scores': criteria_scores
-            })
+        criteria_order = [criterion for criterion in data if criterion + '_weight' in weights]
+        x = np.array([data[criterion] for criterion in criteria_order],
+                     dtype=np.float64).reshape(len(criteria_order), num_countries)
+        data_key = (tuple(criteria_order), hashlib.blake2b(x.tobytes(), digest_size=16).digest())
+        return criteria_order, x, data_key
+    
+    def _normalized(self, criteria_order: List[str], x: np.ndarray, data_key: Tuple) -> np.ndarray:
+        """Min-max normalized copy of x, memoized on its content key"""
+        q = self._cache_get(self._normalized_cache, data_key)
+        if q is None:
+            q = self._min_max(criteria_order, x)
+            q.flags.writeable = False
+            self._cache_put(self._normalized_cache, data_key, q)
+        return q
+    
+    def _cache_get(self, cache: OrderedDict, key: Tuple):
+        """LRU lookup in one of the memo caches"""
+        with self._cache_lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+    
+    def _cache_put(self, cache: OrderedDict, key: Tuple, value) -> None:
+        """LRU insert into one of the memo caches, evicting the oldest entry"""
+        with self._cache_lock:
+            cache[key] = value
+            if len(cache) > SAW_CACHE_SIZE:
+                cache.popitem(last=False)
+    
+    def _min_max(self, criteria_order: List[str], x: np.ndarray) -> np.ndarray:
+        """Min-max normalize every criterion row in one kernel; constant rows become 1.0"""
+        if not criteria_order:
+            return np.zeros_like(x)
         
-        # Sort by score (descending)
-        results.sort(key=lambda x: x['score'], reverse=True)
+        is_cost = self._is_cost[[self._criteria_index[criterion] for criterion in criteria_order]]
+        mn = x.min(axis=1, keepdims=True)
+        mx = x.max(axis=1, keepdims=True)
+        constant = mx == mn
+        value_range = np.where(constant, 1.0, mx - mn)
+        q = np.where(is_cost[:, None], (mx - x) / value_range, (x - mn) / value_range)
+        q[constant[:, 0]] = 1.0
+        return q
+    
+    @staticmethod
+    def _weight_vector(criteria_order: List[str], weights: Dict[str, float]) -> np.ndarray:
+        """Weights aligned with the rows of the normalized matrix"""
+        return np.array([weights[criterion + '_weight'] for criterion in criteria_order], dtype=np.float64)
+    
+    @staticmethod
+    def _score(q: np.ndarray, w: np.ndarray) -> np.ndarray:
+        """Weighted scores as one (C,) @ (C, N) product"""
+        return w @ q
+    
+    @staticmethod
+    def _rank(country_names: List[str], criteria_order: List[str], q: np.ndarray,
+              w: np.ndarray, scores: np.ndarray) -> List[DecisionResult]:
+        """Build DecisionResults in rank order from precomputed scores"""
+        # (N, C) weighted contributions; each result keeps a view of its own row
+        contributions = (q * w[:, None]).T
+        criteria_order = tuple(criteria_order)
         
-        # Calculate percentages and ranks
-        max_score = max(result['score'] for result in results) if results else 1
+        # Rank by score (descending); stable so ties keep input order
+        order = np.argsort(-scores, kind='stable')
+        # Presentation rounding for every country at once
+        percentages = np.round(scores / scores.max() * 100, 2).tolist()
+        score_list = np.round(scores, 4).tolist()
         
-        decision_results = []
-        for rank, result in enumerate(results, 1):
-            decision_results.append(DecisionResult(
-                country=result['country'],
-                score=round(result['score'], 4),
+        return [
+            DecisionResult(
+                country=country_names[i],
+                score=score_list[i],
                 rank=rank,
-                percentage=round((result['score'] / max_score) * 100, 2),
-                criteria_scores=result['criteria_scores']
-            ))
-        
-        return decision_results
+                percentage=percentages[i],
+                criteria_scores_row=contributions[i],
+                criteria_order=criteria_order
+            )
+            for rank, i in enumerate(order.tolist(), 1)
+        ]
 
 
 class SensitivityAnalyzer:
@@ -249,55 +441,74 @@ Returns:
         if variation_range is None:
             variation_range = [-0.2, -0.1, 0, 0.1, 0.2]
         
+        saw = self.saw_analyzer
+        if not data or not base_weights or not country_names:
+            raise ValueError("Data, weights, and country names are required")
+        
+        # Normalization does not depend on the weights, so do it once for every variation
+        criteria_order, q = saw._normalize(data, base_weights, len(country_names))
+        criterion_index = {criterion: k for k, criterion in enumerate(criteria_order)}
+        base_w = saw._weight_vector(criteria_order, base_weights)
+        
         # Get baseline analysis
-        baseline_results = self.saw_analyzer.analyze(data, base_weights, country_names)
+        base_scores = saw._score(q, base_w)
+        baseline_results = saw._rank(country_names, criteria_order, q, base_w, base_scores)
         baseline_ranking = [result.country for result in baseline_results]
+        baseline_top_score = baseline_results[0].score
         
-        sensitivity_results = {}
+        # Every (weight, variation) pair is one row of a weight matrix W, so a
+        # single W @ Q scores the whole sweep
+        weight_names = [weight_name for weight_name in base_weights.keys() if weight_name.endswith('_weight')]
+        sweep = [(weight_name, variation) for weight_name in weight_names for variation in variation_range]
+        new_weights = [base_weights[weight_name] * (1 + variation) for weight_name, variation in sweep]
         
-        # Test each weight
-        for weight_name in base_weights.keys():
-            if not weight_name.endswith('_weight'):
-                continue
-                
+        # Each weight owns a contiguous block of V rows; only its own column differs from base_w
+        num_variations = len(variation_range)
+        w_sweep = np.tile(base_w, (len(sweep), 1))
+        for k, weight_name in enumerate(weight_names):
+            column = criterion_index.get(weight_name.replace('_weight', ''))
+            if column is not None:
+                block = slice(k * num_variations, (k + 1) * num_variations)
+                w_sweep[block, column] = new_weights[block]
+        
+        # Top country per variant in O(N); the first maximum wins, as in the stable ranking
+        all_scores, top_indices = _sweep_scores_numpy(w_sweep, q)
+        top_scores = np.round(all_scores[np.arange(len(sweep)), top_indices], 4).tolist()
+        top_indices = top_indices.tolist()
+        
+        # Only the ranking-change counts need full per-variant orderings
+        orders = np.argsort(-all_scores, axis=1, kind='stable')
+        base_order = np.argsort(-np.round(base_scores, SWEEP_RANK_DECIMALS), kind='stable')
+        # Positions whose country differs from the baseline ranking, per variant
+        all_ranking_changes = (orders != base_order).sum(axis=1).tolist()
+        
+        sensitivity_results = {}
+        for row, (weight_name, variation) in enumerate(sweep):
             criterion_name = weight_name.replace('_weight', '')
-            sensitivity_results[criterion_name] = {
+            criterion_results = sensitivity_results.setdefault(criterion_name, {
                 'variations': [],
                 'ranking_changes': [],
                 'score_changes': []
-            }
+            })
             
-            for variation in variation_range:
-                # Create modified weights
-                modified_weights = base_weights.copy()
-                modified_weights[weight_name] *= (1 + variation)
+            try:
+                # Calculate score changes for top country
+                modified_top_score = top_scores[row]
+                score_change = ((modified_top_score - baseline_top_score) / baseline_top_score) * 100
                 
-                # Run analysis with modified weights
-                try:
-                    modified_results = self.saw_analyzer.analyze(data, modified_weights, country_names)
-                    modified_ranking = [result.country for result in modified_results]
-                    
-                    # Calculate ranking changes
-                    ranking_changes = self._calculate_ranking_changes(baseline_ranking, modified_ranking)
-                    
-                    # Calculate score changes for top country
-                    baseline_top_score = baseline_results[0].score
-                    modified_top_score = modified_results[0].score
-                    score_change = ((modified_top_score - baseline_top_score) / baseline_top_score) * 100
-                    
-                    sensitivity_results[criterion_name]['variations'].append({
-                        'variation_percentage': variation * 100,
-                        'new_weight_value': modified_weights[weight_name],
-                        'top_country': modified_results[0].country,
-                        'top_score': modified_results[0].score,
-                        'score_change_percent': round(score_change, 2)
-                    })
-                    
-                    sensitivity_results[criterion_name]['ranking_changes'].append(ranking_changes)
-                    sensitivity_results[criterion_name]['score_changes'].append(score_change)
-                    
-                except Exception as e:
-                    print(f"Error in sensitivity analysis for {criterion_name} at {variation}: {str(e)}")
+                criterion_results['variations'].append({
+                    'variation_percentage': variation * 100,
+                    'new_weight_value': new_weights[row],
+                    'top_country': country_names[top_indices[row]],
+                    'top_score': modified_top_score,
+                    'score_change_percent': round(score_change, 2)
+                })
+                
+                criterion_results['ranking_changes'].append(all_ranking_changes[row])
+                criterion_results['score_changes'].append(score_change)
+                
+            except Exception as e:
+                print(f"Error in sensitivity analysis for {criterion_name} at {variation}: {str(e)}")
         
         return {
             'baseline_ranking': baseline_ranking,
@@ -305,14 +516,6 @@ Returns:
             'summary': self._generate_sensitivity_summary(sensitivity_results)
         }
     
-    def _calculate_ranking_changes(self, baseline: List[str], modified: List[str]) -> int:
-        """Calculate number of ranking position changes"""
-        changes = 0
-        for i, country in enumerate(baseline):
-            if i < len(modified) and modified[i] != country:
-                changes += 1
-        return changes
-    
     def _generate_sensitivity_summary(self, results: Dict) -> Dict:
         """Generate summary of sensitivity analysis"""
         most_sensitive = None
@@ -320,7 +523,7 @@ Returns:
         
         for criterion, data in results.items():
             if 'score_changes' in data and data['score_changes']:
-                avg_change = np.mean([abs(change) for change in data['score_changes']])
+                avg_change = np.abs(np.asarray(data['score_changes'], dtype=np.float64)).mean()
                 if avg_change > max_avg_change:
                     max_avg_change = avg_change
                     most_sensitive = criterion
@@ -335,17 +538,45 @@ Returns:
 class DecisionManager:
     """Manages decision analysis operations and database interactions"""
     
+    _STOP = object()  # Queue marker that ends the background writer
+    
     def __init__(self, db_path: str = 'dss.db'):
         self.db_path = db_path
         self.saw_analyzer = SAWAnalyzer()
         self.sensitivity_analyzer = SensitivityAnalyzer(self.saw_analyzer)
+        self._result_queue = queue.Queue(maxsize=RESULT_QUEUE_SIZE)
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._local = threading.local()
+        self._indexed = False
     
     def get_connection(self) -> sqlite3.Connection:
-        """Create database connection"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """
+        This thread's long-lived database connection, opened on first use.
+        Callers must not close it; use `with conn:` to commit writes.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            for pragma in SQLITE_PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+        if not self._indexed:
+            self._indexed = self._ensure_indexes(conn)
         return conn
     
+    @staticmethod
+    def _ensure_indexes(conn: sqlite3.Connection) -> bool:
+        """Create the session lookup indexes; False if the tables do not exist yet"""
+        try:
+            with conn:
+                for statement in SESSION_INDEXES:
+                    conn.execute(statement)
+            return True
+        except sqlite3.OperationalError as e:
+            logger.debug(f"Session indexes not created yet: {str(e)}")
+            return False
+    
     def save_preferences(self, preferences: UserPreferences) -> int:
         """Save user preferences to database"""
         # Validate preferences
@@ -355,53 +586,70 @@ class DecisionManager:
         
         try:
             conn = self.get_connection()
-            cursor = conn.cursor()
+            with conn:
+                cursor = conn.execute(INSERT_PREFERENCES_SQL, self._preference_row(preferences))
             
-            cursor.execute('''
-                INSERT INTO user_preferences 
-                (session_id, cost_weight, ranking_weight, language_weight, 
-                 visa_weight, job_weight, climate_weight, safety_weight)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (preferences.session_id, preferences.cost_weight, preferences.ranking_weight,
-                  preferences.language_weight, preferences.visa_weight, preferences.job_weight,
-                  preferences.climate_weight, preferences.safety_weight))
+            return cursor.lastrowid
             
-            preference_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
+        except Exception as e:
+            raise Exception(f"Error saving preferences: {str(e)}")
+    
+    def save_preferences_batch(self, preferences_list: List[UserPreferences]) -> int:
+        """Save several preference sets with one executemany in a single transaction"""
+        # One range check over the whole (batch, weights) matrix; per-item validation
+        # only runs when that fails, to name the offending preferences
+        try:
+            weights = np.array([preferences.weights() for preferences in preferences_list])
+        except (TypeError, ValueError):
+            weights = None
+        batch_valid = (weights is not None and weights.dtype.kind in 'biuf'
+                       and all(preferences.session_id for preferences in preferences_list)
+                       and UserPreferences.validate_array(weights))
+        
+        if not batch_valid:
+            for preferences in preferences_list:
+                is_valid, message = preferences.validate()
+                if not is_valid:
+                    raise ValueError(f"Invalid preferences: {message}")
+        
+        try:
+            conn = self.get_connection()
+            with conn:
+                conn.executemany(INSERT_PREFERENCES_SQL, map(self._preference_row, preferences_list))
             
-            return preference_id
+            return len(preferences_list)
             
         except Exception as e:
             raise Exception(f"Error saving preferences: {str(e)}")
     
+    @staticmethod
+    def _preference_row(preferences: UserPreferences) -> Tuple:
+        """Parameters for INSERT_PREFERENCES_SQL"""
+        return (preferences.session_id, *preferences.weights())
+    
     def get_preferences(self, session_id: str) -> Optional[UserPreferences]:
         """Get latest preferences for session"""
         try:
             conn = self.get_connection()
             cursor = conn.execute('''
-                SELECT * FROM user_preferences 
+                SELECT session_id, cost_weight, ranking_weight, language_weight, visa_weight,
+                       job_weight, climate_weight, safety_weight, created_at
+                FROM user_preferences 
                 WHERE session_id = ? 
                 ORDER BY created_at DESC 
                 LIMIT 1
             ''', (session_id,))
             
             row = cursor.fetchone()
-            conn.close()
             
             if not row:
                 return None
             
+            # Selected columns follow the UserPreferences field order
+            *values, created_at = row
             return UserPreferences(
-                session_id=row['session_id'],
-                cost_weight=row['cost_weight'],
-                ranking_weight=row['ranking_weight'],
-                language_weight=row['language_weight'],
-                visa_weight=row['visa_weight'],
-                job_weight=row['job_weight'],
-                climate_weight=row['climate_weight'],
-                safety_weight=row['safety_weight'],
-                created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None
+                *values,
+                created_at=datetime.fromisoformat(created_at) if created_at else None
             )
             
         except Exception as e:
@@ -412,56 +660,147 @@ class DecisionManager:
         """Save analysis results to database"""
         try:
             conn = self.get_connection()
-            cursor = conn.cursor()
+            with conn:
+                cursor = conn.execute(INSERT_RESULT_SQL,
+                                      self._serialize_analysis_result(session_id, results, preferences))
             
-            # Convert results to JSON
-            results_json = json.dumps([{
-                'rank': result.rank,
-                'country': result.country,
-                'score': result.score,
-                'percentage': result.percentage,
-                'criteria_scores': result.criteria_scores
-            } for result in results])
-            
-            preferences_json = json.dumps(preferences.to_analysis_weights())
-            
-            cursor.execute('''
-                INSERT INTO decision_results (session_id, country_scores, preferences)
-                VALUES (?, ?, ?)
-            ''', (session_id, results_json, preferences_json))
-            
-            result_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
-            
-            return result_id
+            return cursor.lastrowid
             
         except Exception as e:
             raise Exception(f"Error saving analysis results: {str(e)}")
     
-    def get_analysis_history(self, session_id: str, limit: int = 10) -> List[Dict]:
-        """Get analysis history for session"""
+    def queue_analysis_result(self, session_id: str, results: List[DecisionResult],
+                              preferences: UserPreferences) -> None:
+        """
+        Queue analysis results for batched persistence by the background writer,
+        writing them inline if the writer is backed up
+        """
+        row = self._serialize_analysis_result(session_id, results, preferences)
+        self._ensure_writer()
         try:
+            self._result_queue.put_nowait(row)
+        except queue.Full:
             conn = self.get_connection()
-            cursor = conn.execute('''
-                SELECT * FROM decision_results 
-                WHERE session_id = ? 
-                ORDER BY created_at DESC 
-                LIMIT ?
-            ''', (session_id, limit))
+            with conn:
+                conn.execute(INSERT_RESULT_SQL, row)
+    
+    def flush_pending_results(self) -> None:
+        """Block until every result queued before this call has been written"""
+        if self._writer is None:
+            return
+        done = threading.Event()
+        self._result_queue.put(done)
+        done.wait()
+    
+    def _serialize_analysis_result(self, session_id: str, results: List[DecisionResult],
+                                   preferences: UserPreferences) -> Tuple[str, str, str]:
+        """Build the decision_results row for an analysis"""
+        results_json = dumps_json([{
+            'rank': result.rank,
+            'country': result.country,
+            'score': result.score,
+            'percentage': result.percentage,
+            'criteria_scores': result.criteria_scores
+        } for result in results])
+        
+        return session_id, results_json, dumps_json(preferences.to_analysis_weights())
+    
+    def _ensure_writer(self) -> None:
+        """Start the background writer thread on first use"""
+        if self._writer is not None:
+            return
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_results, daemon=True,
+                                                name='decision-results-writer')
+                self._writer.start()
+                atexit.register(self._stop_writer)
+    
+    def _stop_writer(self) -> None:
+        """Write out queued results and stop the background writer"""
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._result_queue.put(self._STOP)
+            writer.join()
+    
+    def _write_results(self) -> None:
+        """
+        Drain queued results in batches, one transaction per batch. A flush Event
+        or the stop marker cuts the batch short; Events are set once the rows
+        queued before them are written.
+        """
+        while True:
+            items = [self._result_queue.get()]
+            deadline = time.monotonic() + RESULT_FLUSH_INTERVAL
+            while isinstance(items[-1], tuple) and len(items) < RESULT_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._result_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            rows = [item for item in items if isinstance(item, tuple)]
+            try:
+                if rows:
+                    conn = self.get_connection()
+                    with conn:
+                        conn.executemany(INSERT_RESULT_SQL, rows)
+            except Exception as e:
+                logger.error(f"Error saving {len(rows)} queued analysis results: {str(e)}")
+            
+            for item in items:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if items[-1] is self._STOP:
+                return
+    
+    def get_analysis_history(self, session_id: str, limit: int = 10,
+                             before: Optional[Tuple[str, int]] = None) -> List[Dict]:
+        """
+        Get analysis history for session, newest first
+        
+        Args:
+            session_id: Session identifier
+            limit: Maximum number of entries to return
+            before: Keyset cursor (created_at, id) of the last entry already seen;
+                only older entries are returned
+        """
+        self.flush_pending_results()
+        try:
+            conn = self.get_connection()
+            if before is None:
+                cursor = conn.execute('''
+                    SELECT id, session_id, country_scores, preferences, created_at
+                    FROM decision_results 
+                    WHERE session_id = ? 
+                    ORDER BY created_at DESC, id DESC 
+                    LIMIT ?
+                ''', (session_id, limit))
+            else:
+                cursor = conn.execute('''
+                    SELECT id, session_id, country_scores, preferences, created_at
+                    FROM decision_results 
+                    WHERE session_id = ? AND (created_at, id) < (?, ?)
+                    ORDER BY created_at DESC, id DESC 
+                    LIMIT ?
+                ''', (session_id, before[0], before[1], limit))
             
             rows = cursor.fetchall()
-            conn.close()
             
-            history = []
-            for row in rows:
-                history.append({
-                    'id': row['id'],
-                    'session_id': row['session_id'],
-                    'results': json.loads(row['country_scores']),
-                    'preferences': json.loads(row['preferences']),
-                    'created_at': row['created_at']
-                })
+            # Fill a list sized from the fetched rows instead of growing it per row
+            history = [None] * len(rows)
+            loads = loads_json
+            for i, (result_id, result_session, country_scores, result_preferences, created_at) in enumerate(rows):
+                history[i] = {
+                    'id': result_id,
+                    'session_id': result_session,
+                    'results': loads(country_scores),
+                    'preferences': loads(result_preferences),
+                    'created_at': created_at
+                }
             
             return history
             
@@ -3,13 +3,31 @@ Routes package initialization.
 Contains all API route definitions for the DSS application.
 """
 
-from flask import Blueprint
+from datetime import datetime
+from flask import Blueprint, g
+from models.country import CountryManager
+from models.decision import DecisionManager
+from services.saw_algorithm import SAWService
+from services.analytics import AnalyticsService
 
 # Create blueprints for different route groups
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 data_bp = Blueprint('data', __name__, url_prefix='/api/data')
 
+# Services shared by every route module, so caches warm once per worker
+country_manager = CountryManager()
+decision_manager = DecisionManager()
+saw_service = SAWService()
+analytics_service = AnalyticsService(country_manager, decision_manager, saw_service)
+
+
+def request_timestamp() -> str:
+    """Local ISO timestamp of the current request, formatted once per request"""
+    if 'now_iso' not in g:
+        g.now_iso = datetime.now().isoformat()
+    return g.now_iso
+
 # Import route modules to register them with blueprints
 from . import api, data
 
-__all__ = ['api_bp', 'data_bp']
+__all__ = ['api_bp', 'data_bp', 'request_timestamp']
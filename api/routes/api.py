@@ -4,19 +4,14 @@ Handles decision analysis, sensitivity analysis, and preference management.
 """
 
 from flask import request, jsonify, current_app
-from . import api_bp
-from models.country import CountryManager
-from models.decision import DecisionManager, UserPreferences
-from services.saw_algorithm import SAWService
-from services.analytics import AnalyticsService
+from . import api_bp, country_manager, decision_manager, saw_service, analytics_service, request_timestamp
+from models.decision import UserPreferences, WEIGHT_FIELDS
 import uuid
-from datetime import datetime
 
-# Initialize services
-country_manager = CountryManager()
-decision_manager = DecisionManager()
-saw_service = SAWService()
-analytics_service = AnalyticsService()
+
+def _parse_preferences(data, session_id):
+    """Build UserPreferences from a request payload; missing weights default to 1.0"""
+    return UserPreferences(session_id, *(float(data.get(field, 1.0)) for field in WEIGHT_FIELDS))
 
 
 @api_bp.route('/health', methods=['GET'])
@@ -24,7 +19,7 @@ def health_check():
     """API health check endpoint"""
     return jsonify({
         'status': 'healthy',
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': request_timestamp(),
         'version': '1.0.0',
         'service': 'DSS API'
     })
@@ -44,7 +39,8 @@ def analyze_decision():
         "visa_weight": 1.0,
         "job_weight": 1.8,
         "climate_weight": 0.8,
-        "safety_weight": 1.3
+        "safety_weight": 1.3,
+        "top_k": 10 (optional, only rank and return the best top_k countries)
     }
     """
     try:
@@ -56,20 +52,18 @@ def analyze_decision():
                 'error': 'JSON payload is required'
             }), 400
         
+        top_k = data.get('top_k')
+        if top_k is not None and (type(top_k) is not int or top_k < 1):
+            return jsonify({
+                'success': False,
+                'error': 'top_k must be a positive integer'
+            }), 400
+        
         # Generate session ID if not provided
         session_id = data.get('session_id', str(uuid.uuid4()))
         
         # Create user preferences object
-        preferences = UserPreferences(
-            session_id=session_id,
-            cost_weight=float(data.get('cost_weight', 1.0)),
-            ranking_weight=float(data.get('ranking_weight', 1.0)),
-            language_weight=float(data.get('language_weight', 1.0)),
-            visa_weight=float(data.get('visa_weight', 1.0)),
-            job_weight=float(data.get('job_weight', 1.0)),
-            climate_weight=float(data.get('climate_weight', 1.0)),
-            safety_weight=float(data.get('safety_weight', 1.0))
-        )
+        preferences = _parse_preferences(data, session_id)
         
         # Validate preferences
         is_valid, message = preferences.validate()
@@ -88,12 +82,16 @@ def analyze_decision():
                 'error': f'Error retrieving countries data: {str(e)}'
             }), 500
         
+        # Analysis weights, built once for the analysis and the response
+        analysis_weights = preferences.to_analysis_weights()
+        
         # Perform SAW analysis
         try:
             results = saw_service.analyze(
                 countries_data, 
-                preferences.to_analysis_weights(), 
-                country_names
+                analysis_weights, 
+                country_names,
+                top_k=top_k
             )
         except Exception as e:
             return jsonify({
@@ -104,31 +102,29 @@ def analyze_decision():
         # Save preferences and results
         try:
             decision_manager.save_preferences(preferences)
-            decision_manager.save_analysis_result(session_id, results, preferences)
+            decision_manager.queue_analysis_result(session_id, results, preferences)
         except Exception as e:
             current_app.logger.warning(f'Failed to save analysis results: {str(e)}')
         
         # Format response
-        response_results = []
-        for result in results:
-            response_results.append({
-                'rank': result.rank,
-                'country': result.country,
-                'score': result.score,
-                'percentage': result.percentage,
-                'criteria_breakdown': result.criteria_scores
-            })
+        response_results = [{
+            'rank': result.rank,
+            'country': result.country,
+            'score': result.score,
+            'percentage': result.percentage,
+            'criteria_breakdown': result.criteria_scores
+        } for result in results]
         
         return jsonify({
             'success': True,
             'session_id': session_id,
             'results': response_results,
             'analysis_summary': {
-                'total_countries': len(results),
+                'total_countries': len(country_names),
                 'top_recommendation': results[0].country if results else None,
                 'methodology': 'Simple Additive Weighting (SAW)',
-                'weights_used': preferences.to_analysis_weights(),
-                'analysis_timestamp': datetime.now().isoformat()
+                'weights_used': analysis_weights,
+                'analysis_timestamp': request_timestamp()
             }
         })
         
@@ -171,16 +167,7 @@ def sensitivity_analysis():
         session_id = data.get('session_id', str(uuid.uuid4()))
         
         # Create user preferences
-        preferences = UserPreferences(
-            session_id=session_id,
-            cost_weight=float(data.get('cost_weight', 1.0)),
-            ranking_weight=float(data.get('ranking_weight', 1.0)),
-            language_weight=float(data.get('language_weight', 1.0)),
-            visa_weight=float(data.get('visa_weight', 1.0)),
-            job_weight=float(data.get('job_weight', 1.0)),
-            climate_weight=float(data.get('climate_weight', 1.0)),
-            safety_weight=float(data.get('safety_weight', 1.0))
-        )
+        preferences = _parse_preferences(data, session_id)
         
         # Validate preferences
         is_valid, message = preferences.validate()
@@ -197,9 +184,10 @@ def sensitivity_analysis():
         countries_data, country_names = country_manager.get_countries_data_for_analysis()
         
         # Perform sensitivity analysis
+        analysis_weights = preferences.to_analysis_weights()
         sensitivity_results = analytics_service.perform_sensitivity_analysis(
             countries_data,
-            preferences.to_analysis_weights(),
+            analysis_weights,
             country_names,
             variation_range
         )
@@ -211,8 +199,8 @@ def sensitivity_analysis():
             'analysis_summary': {
                 'methodology': 'Weight Variation Analysis',
                 'variation_range': variation_range,
-                'base_weights': preferences.to_analysis_weights(),
-                'analysis_timestamp': datetime.now().isoformat()
+                'base_weights': analysis_weights,
+                'analysis_timestamp': request_timestamp()
             }
         })
         
@@ -224,6 +212,81 @@ def sensitivity_analysis():
         }), 500
 
 
+@api_bp.route('/sensitivity/monte_carlo', methods=['POST'])
+def monte_carlo_analysis():
+    """
+    Perform Monte Carlo sensitivity analysis on decision weights
+    
+    Expected JSON payload:
+    {
+        "session_id": "optional_session_id",
+        "cost_weight": 1.5,
+        ... (same as decision analysis)
+        "n_samples": 10000, // optional, default 1000
+        "perturbation": 0.05, // optional, maximum relative weight change
+        "seed": 42 // optional, non-negative integer
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({
+                'success': False,
+                'error': 'JSON payload is required'
+            }), 400
+        
+        session_id = data.get('session_id', str(uuid.uuid4()))
+        
+        # Create user preferences
+        preferences = _parse_preferences(data, session_id)
+        
+        # Validate preferences
+        is_valid, message = preferences.validate()
+        if not is_valid:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid preferences: {message}'
+            }), 400
+        
+        # Get countries data
+        countries_data, country_names = country_manager.get_countries_data_for_analysis()
+        
+        # Perform Monte Carlo analysis
+        analysis_weights = preferences.to_analysis_weights()
+        monte_carlo_results = analytics_service.perform_monte_carlo_analysis(
+            countries_data,
+            analysis_weights,
+            country_names,
+            n_samples=data.get('n_samples', 1000),
+            perturbation=data.get('perturbation', 0.05),
+            seed=data.get('seed')
+        )
+        
+        return jsonify({
+            'success': True,
+            'session_id': session_id,
+            'monte_carlo_results': monte_carlo_results,
+            'analysis_summary': {
+                'methodology': 'Monte Carlo Weight Perturbation',
+                'base_weights': analysis_weights,
+                'analysis_timestamp': request_timestamp()
+            }
+        })
+        
+    except ValueError as ve:
+        return jsonify({
+            'success': False,
+            'error': f'Invalid input data: {str(ve)}'
+        }), 400
+    except Exception as e:
+        current_app.logger.error(f'Monte Carlo analysis error: {str(e)}')
+        return jsonify({
+            'success': False,
+            'error': f'Error during Monte Carlo analysis: {str(e)}'
+        }), 500
+
+
 @api_bp.route('/preferences', methods=['POST'])
 def save_preferences():
     """
@@ -254,16 +317,7 @@ def save_preferences():
             }), 400
         
         # Create preferences object
-        preferences = UserPreferences(
-            session_id=session_id,
-            cost_weight=float(data.get('cost_weight', 1.0)),
-            ranking_weight=float(data.get('ranking_weight', 1.0)),
-            language_weight=float(data.get('language_weight', 1.0)),
-            visa_weight=float(data.get('visa_weight', 1.0)),
-            job_weight=float(data.get('job_weight', 1.0)),
-            climate_weight=float(data.get('climate_weight', 1.0)),
-            safety_weight=float(data.get('safety_weight', 1.0))
-        )
+        preferences = _parse_preferences(data, session_id)
         
         # Validate preferences
         is_valid, message = preferences.validate()
@@ -328,16 +382,36 @@ def get_preferences(session_id):
 
 @api_bp.route('/history/<session_id>', methods=['GET'])
 def get_analysis_history(session_id):
-    """Get analysis history for a session"""
+    """
+    Get analysis history for a session
+    
+    Query parameters:
+    - limit: number of entries per page
+    - before_created_at, before_id: cursor from a previous page's next_cursor
+    """
     try:
         limit = request.args.get('limit', 10, type=int)
-        history = decision_manager.get_analysis_history(session_id, limit)
+        before_created_at = request.args.get('before_created_at')
+        before_id = request.args.get('before_id', type=int)
+        before = (before_created_at, before_id) if before_created_at and before_id is not None else None
+        
+        # Fetch one extra entry to know whether another page exists
+        fetch_limit = limit + 1 if limit > 0 else limit
+        history = decision_manager.get_analysis_history(session_id, fetch_limit, before)
+        next_cursor = None
+        if limit > 0 and len(history) > limit:
+            history = history[:limit]
+            next_cursor = {
+                'before_created_at': history[-1]['created_at'],
+                'before_id': history[-1]['id']
+            }
         
         return jsonify({
             'success': True,
             'session_id': session_id,
             'history': history,
-            'count': len(history)
+            'count': len(history),
+            'next_cursor': next_cursor
         })
         
     except Exception as e:
@@ -377,7 +451,7 @@ def compare_countries():
         return jsonify({
             'success': True,
             'comparison': comparison_data,
-            'analysis_timestamp': datetime.now().isoformat()
+            'analysis_timestamp': request_timestamp()
         })
         
     except Exception as e:
@@ -4,16 +4,19 @@ Handles CRUD operations for countries and data updates.
 """
 
 from flask import request, jsonify, current_app
-from . import data_bp
-from models.country import CountryManager, Country
-from services.analytics import AnalyticsService
+from . import data_bp, country_manager, analytics_service, request_timestamp
+from models.country import Country, CRITERIA, SORTABLE_FIELDS
 from datetime import datetime
+import numpy as np
 import csv
 import io
+import operator
 
-# Initialize services
-country_manager = CountryManager()
-analytics_service = AnalyticsService()
+# Calls Country.to_dict, for mapping over country lists
+to_dict = operator.methodcaller('to_dict')
+
+# CSV columns parsed as floats
+NUMERIC_FIELDS = frozenset(CRITERIA)
 
 
 @data_bp.route('/countries', methods=['GET'])
@@ -34,26 +37,18 @@ def get_all_countries():
         limit = request.args.get('limit', type=int)
         offset = request.args.get('offset', 0, type=int)
         
-        # Get all countries
-        countries = country_manager.get_all_countries()
-        
-        # Sort countries
-        valid_sort_fields = ['name', 'cost_of_living', 'university_ranking', 
-                            'language_barrier', 'visa_difficulty', 'job_prospects', 
-                            'climate_score', 'safety_index']
-        
-        if sort_by in valid_sort_fields:
-            reverse_order = order == 'desc'
-            countries.sort(key=lambda x: getattr(x, sort_by), reverse=reverse_order)
+        # Sort and paginate in SQL; unknown sort fields keep the default name order
+        if sort_by in SORTABLE_FIELDS:
+            descending = order == 'desc'
+        else:
+            sort_by, descending = 'name', False
         
-        # Apply pagination
-        if limit:
-            countries = countries[offset:offset + limit]
-        elif offset > 0:
-            countries = countries[offset:]
+        countries = country_manager.get_countries_paginated(
+            sort_by, descending, limit or None, max(offset, 0)
+        )
         
         # Convert to dict format
-        countries_data = [country.to_dict() for country in countries]
+        countries_data = list(map(to_dict, countries))
         
         return jsonify({
             'success': True,
@@ -62,7 +57,7 @@ def get_all_countries():
             'pagination': {
                 'offset': offset,
                 'limit': limit,
-                'total_available': len(country_manager.get_all_countries())
+                'total_available': country_manager.count_countries()
             }
         })
         
@@ -306,14 +301,14 @@ def bulk_upload_countries():
 def get_statistics():
     """Get database statistics and analytics"""
     try:
-        stats = country_manager.get_statistics()
+        stats = country_manager.get_statistics(include_names=True)
         analytics_stats = analytics_service.get_system_statistics()
         
         return jsonify({
             'success': True,
             'database_statistics': stats,
             'analytics_statistics': analytics_stats,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': request_timestamp()
         })
         
     except Exception as e:
@@ -343,7 +338,7 @@ def export_countries():
             return export_as_csv(countries, fields)
         else:
             # Default to JSON
-            countries_data = [country.to_dict() for country in countries]
+            countries_data = list(map(to_dict, countries))
             
             # Filter fields if specified
             if fields:
@@ -357,7 +352,7 @@ def export_countries():
                 'success': True,
                 'countries': countries_data,
                 'count': len(countries_data),
-                'export_timestamp': datetime.now().isoformat()
+                'export_timestamp': request_timestamp()
             })
         
     except Exception as e:
@@ -372,71 +367,131 @@ def export_countries():
 
 def bulk_upload_from_json(countries_data):
     """Upload countries from JSON array"""
-    results = {
-        'success_count': 0,
-        'error_count': 0,
-        'errors': []
-    }
-    
+    parsed = []
     for i, country_data in enumerate(countries_data):
         try:
-            country = Country.from_dict(country_data)
-            country_manager.add_country(country)
-            results['success_count'] += 1
+            parsed.append((i + 1, country_data, Country.from_dict(country_data)))
         except Exception as e:
-            results['error_count'] += 1
-            results['errors'].append({
-                'row': i + 1,
-                'error': str(e),
-                'data': country_data
-            })
+            parsed.append((i + 1, country_data, e))
     
-    return results
+    return add_parsed_countries(parsed)
 
 
 def parse_and_upload_csv(csv_data):
     """Parse CSV data and upload countries"""
-    results = {
-        'success_count': 0,
-        'error_count': 0,
-        'errors': []
-    }
+    columns = parse_csv_columns(csv_data)
+    if columns is None:
+        return add_parsed_countries(parse_csv_rows(csv_data))
+    
+    header, parsed = columns
+    return add_parsed_countries(parsed, header)
+
+
+def parse_csv_columns(csv_data):
+    """
+    Parse CSV column by column, converting each criterion column with one
+    NumPy cast. Returns (header, parsed) with each row kept as its raw field
+    list, or None when the data needs parse_csv_rows to report per-row
+    problems (ragged rows, blank or duplicate headers, bad numbers).
+    """
+    reader = csv.reader(io.StringIO(csv_data))
+    header = next(reader, None)
+    if header is None:
+        return [], []
+    
+    # Like DictReader, the first line is the header even if blank; blank rows after it are skipped
+    rows = [row for row in reader if row]
+    width = len(header)
+    if '' in header or len(set(header)) != width or any(len(row) != width for row in rows):
+        return None
     
+    columns = dict(zip(header, zip(*rows))) if rows else {field: () for field in header}
+    
+    scores = []
+    for criterion in CRITERIA:
+        values = np.array(columns.get(criterion, ()), dtype=object)
+        if not len(values):
+            scores.append(np.zeros(len(rows)))
+            continue
+        # Empty cells are skipped like missing keys, which default to 0
+        values[values == ''] = '0'
+        try:
+            scores.append(values.astype(np.float64))
+        except ValueError:
+            return None
+    
+    names = [name.strip() for name in columns.get('name', ('',) * len(rows))]
+    ids = [value.strip() if value else None for value in columns.get('id', (None,) * len(rows))]
+    
+    return header, [
+        (row_num, row, Country(country_id, name, *row_scores))
+        for row_num, row, country_id, name, row_scores
+        in zip(range(2, len(rows) + 2), rows, ids, names, zip(*(column.tolist() for column in scores)))
+    ]
+
+
+def parse_csv_rows(csv_data):
+    """Parse CSV data row by row, recording a parse error for each bad row"""
     csv_file = io.StringIO(csv_data)
     reader = csv.DictReader(csv_file)
     
+    parsed = []
     for row_num, row in enumerate(reader, start=2):  # Start from 2 (header is row 1)
         try:
             # Clean and convert data
             country_data = {}
             for key, value in row.items():
                 if key and value:  # Skip empty keys/values
-                    if key in ['cost_of_living', 'university_ranking', 'language_barrier',
-                              'visa_difficulty', 'job_prospects', 'climate_score', 'safety_index']:
+                    if key in NUMERIC_FIELDS:
                         country_data[key] = float(value)
                     else:
                         country_data[key] = value.strip()
             
-            country = Country.from_dict(country_data)
-            country_manager.add_country(country)
-            results['success_count'] += 1
+            parsed.append((row_num, row, Country.from_dict(country_data)))
             
         except Exception as e:
+            parsed.append((row_num, row, e))
+    
+    return parsed
+
+
+def add_parsed_countries(parsed, header=None):
+    """
+    Insert parsed (row, data, Country or parse error) entries in one batch
+    and report per-row successes and errors in input order. With a header,
+    data is a raw CSV field list, turned into a dict only for failed rows.
+    """
+    results = {
+        'success_count': 0,
+        'error_count': 0,
+        'errors': []
+    }
+    
+    countries = [country for _, _, country in parsed if isinstance(country, Country)]
+    outcomes = iter(country_manager.add_countries(countries) if countries else [])
+    
+    for row, data, country in parsed:
+        if isinstance(country, Country):
+            _, error = next(outcomes)
+        else:
+            error = str(country)
+        
+        if error is None:
+            results['success_count'] += 1
+        else:
             results['error_count'] += 1
             results['errors'].append({
-                'row': row_num,
-                'error': str(e),
-                'data': row
+                'row': row,
+                'error': error,
+                'data': dict(zip(header, data)) if header is not None else data
             })
     
     return results
 
 
 def export_as_csv(countries, fields=None):
-    """Export countries as CSV"""
-    from flask import Response
-    
-    output = io.StringIO()
+    """Export countries as CSV, streamed one row at a time"""
+    from flask import Response, stream_with_context
     
     # Define all possible fields
     all_fields = ['id', 'name', 'cost_of_living', 'university_ranking', 
@@ -446,19 +501,24 @@ def export_as_csv(countries, fields=None):
     # Use specified fields or all fields
     csv_fields = fields if fields else all_fields
     
-    writer = csv.DictWriter(output, fieldnames=csv_fields)
-    writer.writeheader()
-    
-    for country in countries:
-        country_dict = country.to_dict()
-        # Filter to only include requested fields
-        filtered_dict = {field: country_dict.get(field, '') for field in csv_fields}
-        writer.writerow(filtered_dict)
-    
-    output.seek(0)
+    def generate():
+        # Reuse one small buffer so memory stays constant per row
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=csv_fields)
+        
+        writer.writeheader()
+        yield buffer.getvalue()
+        
+        for country in countries:
+            country_dict = country.to_dict()
+            buffer.seek(0)
+            buffer.truncate(0)
+            # Filter to only include requested fields
+            writer.writerow({field: country_dict.get(field, '') for field in csv_fields})
+            yield buffer.getvalue()
     
     return Response(
-        output.getvalue(),
+        stream_with_context(generate()),
         mimetype='text/csv',
         headers={'Content-Disposition': f'attachment;filename=countries_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'}
     )
@@ -6,23 +6,78 @@ Provides sensitivity analysis, statistical computations, and reporting services.
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple, Optional, Any
-from models.country import CountryManager
+from models.country import CountryManager, CRITERIA
 from models.decision import DecisionManager, UserPreferences
-from .saw_algorithm import SAWService
+from .saw_algorithm import SAWService, RANK_DECIMALS
 import logging
 from datetime import datetime, timedelta
-import json
+from collections import Counter
+import sqlite3
+import time
+
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched per round trip when streaming stored analysis results
+FETCH_CHUNK_SIZE = 4096
+
+# Seconds the usage aggregates are reused before being recomputed
+ANALYSIS_STATS_TTL = 30
+
+# Upper bound on Monte Carlo weight samples per request
+MAX_MONTE_CARLO_SAMPLES = 100000
+
+# Weight samples scored per matmul, bounding the (countries, samples) score block
+MONTE_CARLO_CHUNK_SIZE = 4096
+
 
 class AnalyticsService:
     """Advanced analytics and reporting service"""
     
-    def __init__(self):
-        self.country_manager = CountryManager()
-        self.decision_manager = DecisionManager()
-        self.saw_service = SAWService()
+    def __init__(self,
+                 country_manager: Optional[CountryManager] = None,
+                 decision_manager: Optional[DecisionManager] = None,
+                 saw_service: Optional[SAWService] = None):
+        # Share the caller's long-lived collaborators instead of building duplicates
+        self.country_manager = country_manager or CountryManager()
+        self.decision_manager = decision_manager or DecisionManager()
+        self.saw_service = saw_service or SAWService()
+        self._normalized_cache = None
+        self._country_cache = None
+        self._analysis_stats_cache = None
+        self._has_json1 = self._detect_json1()
+        self._ensure_indexes()
+    
+    def _detect_json1(self) -> bool:
+        """Check whether the SQLite build provides the json1 functions"""
+        try:
+            conn = self.decision_manager.get_connection()
+            conn.execute('''SELECT json_extract('{"a":1}', '$.a')''')
+            return True
+        except sqlite3.Error:
+            logger.info("SQLite json1 extension unavailable; parsing analysis results in Python")
+            return False
+    
+    def _ensure_indexes(self) -> None:
+        """Create indexes used by the statistics queries"""
+        try:
+            conn = self.decision_manager.get_connection()
+            # Covering index so the usage counters never touch the result blobs
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_dr_created_session
+                ON decision_results(created_at, session_id)
+            ''')
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not create analytics indexes: {str(e)}")
+    
+    def _conn(self) -> sqlite3.Connection:
+        """Return this thread's long-lived connection, shared with the decision manager"""
+        return self.decision_manager.get_connection()
     
     def perform_sensitivity_analysis(self, 
                                    data: Dict[str, List[float]], 
@@ -45,22 +100,44 @@ class AnalyticsService:
             variation_range = [-0.3, -0.2, -0.1, 0, 0.1, 0.2, 0.3]
         
         try:
-            # Get baseline analysis
-            baseline_results = self.saw_service.analyze(data, base_weights, country_names)
-            baseline_ranking = [result.country for result in baseline_results]
-            baseline_scores = {result.country: result.score for result in baseline_results}
+            # Normalize once and lay the base weights out as a vector aligned with its columns
+            criteria_order, normalized_matrix = self._get_normalized_matrix(data)
+            criterion_index = {criterion: i for i, criterion in enumerate(criteria_order)}
+            base = np.fromiter(
+                (base_weights.get(criterion + '_weight', 0.0) for criterion in criteria_order),
+                dtype=np.float64, count=len(criteria_order)
+            )
             
-            sensitivity_results = {}
+            # One (K*V + 1, criteria) weight matrix covers every criterion's variations:
+            # row block k holds the base weights with criterion k scaled per variation,
+            # and the last row holds the unmodified base weights for the baseline
+            weight_names = [name for name in base_weights.keys() if name.endswith('_weight')]
+            variation_array = np.asarray(variation_range, dtype=np.float64)
+            num_variations = len(variation_array)
+            weights_matrix = np.tile(base, (len(weight_names) * num_variations + 1, 1))
+            for k, weight_name in enumerate(weight_names):
+                criterion_idx = criterion_index.get(weight_name.replace('_weight', ''))
+                if criterion_idx is not None:
+                    weights_matrix[k * num_variations:(k + 1) * num_variations, criterion_idx] *= 1 + variation_array
+            
+            # Score, rank and round the whole sweep with one matmul and one sort. The
+            # baseline is ranked from the same product, so identical weights always
+            # give identical rankings
+            scores = self.saw_service.analyze_batch(normalized_matrix, weights_matrix)
+            rankings = np.argsort(-np.round(scores, RANK_DECIMALS), axis=0, kind='stable')
+            rounded_scores = np.round(scores, 4)
+            
+            baseline_idx = rankings[:, -1]
+            baseline_array = rounded_scores[baseline_idx, -1]
+            baseline_ranking = [country_names[i] for i in baseline_idx.tolist()]
+            baseline_scores = dict(zip(baseline_ranking, baseline_array.tolist()))
             
-            # Analyze each weight criterion
-            for weight_name in base_weights.keys():
-                if not weight_name.endswith('_weight'):
-                    continue
-                
-                criterion_name = weight_name.replace('_weight', '')
-                sensitivity_results[criterion_name] = self._analyze_criterion_sensitivity(
-                    data, base_weights, country_names, weight_name, 
-                    variation_range, baseline_ranking, baseline_scores
+            sensitivity_results = {}
+            for k, weight_name in enumerate(weight_names):
+                block = slice(k * num_variations, (k + 1) * num_variations)
+                sensitivity_results[weight_name.replace('_weight', '')] = self._analyze_criterion_sensitivity(
+                    rankings[:, block], rounded_scores[:, block], base_weights[weight_name], weight_name,
+                    country_names, variation_range, baseline_ranking, baseline_idx, baseline_array
                 )
             
             # Calculate overall sensitivity metrics
@@ -93,51 +170,69 @@ class AnalyticsService:
             raise Exception(f"Sensitivity analysis error: {str(e)}")
     
     def _analyze_criterion_sensitivity(self, 
-                                     data: Dict[str, List[float]], 
-                                     base_weights: Dict[str, float],
-                                     country_names: List[str],
+                                     rankings: np.ndarray,
+                                     rounded_scores: np.ndarray,
+                                     original_weight: float,
                                      weight_name: str,
+                                     country_names: List[str],
                                      variation_range: List[float],
                                      baseline_ranking: List[str],
-                                     baseline_scores: Dict[str, float]) -> Dict:
-        """Analyze sensitivity for a specific criterion"""
-        
+                                     baseline_idx: np.ndarray,
+                                     baseline_array: np.ndarray) -> Dict:
+        """
+        Analyze sensitivity for a specific criterion from its block of the sweep:
+        rankings and rounded_scores have one column per variation
+        """
+
         variations = []
-        ranking_changes = []
-        score_changes = []
-        top_country_changes = []
-        
-        for variation in variation_range:
+        # Running aggregates for the criterion metrics
+        count = 0
+        ranking_change_sum = 0
+        ranking_change_max = 0
+        score_change_sum = 0.0
+        score_change_max = 0.0
+        top_country_change_count = 0
+
+        variation_array = np.asarray(variation_range, dtype=np.float64)
+
+        # Positional ranking changes for every variation in one pass over the rank matrix
+        ranking_change_counts = np.count_nonzero(
+            rankings[:len(baseline_idx)] != baseline_idx[:, None], axis=0
+        ).tolist()
+
+        # Presentation rounding for every variation at once
+        variation_percentages = np.round(variation_array * 100, 1).tolist()
+        new_weights = np.round(original_weight * (1 + variation_array), 3).tolist()
+
+        for k, variation in enumerate(variation_range):
             try:
-                # Create modified weights
-                modified_weights = base_weights.copy()
-                original_weight = modified_weights[weight_name]
-                modified_weights[weight_name] = original_weight * (1 + variation)
-                
-                # Run analysis with modified weights
-                modified_results = self.saw_service.analyze(data, modified_weights, country_names)
-                modified_ranking = [result.country for result in modified_results]
-                modified_scores = {result.country: result.score for result in modified_results}
-                
+                modified_ranking = [country_names[i] for i in rankings[:5, k]]
+
                 # Calculate metrics
-                ranking_change_count = self._count_ranking_changes(baseline_ranking, modified_ranking)
-                score_changes_dict = self._calculate_score_changes(baseline_scores, modified_scores)
+                ranking_change_count = ranking_change_counts[k]
+                score_changes_dict = self._calculate_score_changes(
+                    baseline_array, rounded_scores[baseline_idx, k], baseline_ranking
+                )
                 top_country_changed = baseline_ranking[0] != modified_ranking[0] if baseline_ranking and modified_ranking else False
                 
                 variation_result = {
-                    'variation_percentage': round(variation * 100, 1),
-                    'new_weight_value': round(modified_weights[weight_name], 3),
+                    'variation_percentage': variation_percentages[k],
+                    'new_weight_value': new_weights[k],
                     'ranking_changes': ranking_change_count,
                     'top_country': modified_ranking[0] if modified_ranking else None,
                     'top_country_changed': top_country_changed,
                     'score_changes': score_changes_dict,
-                    'new_ranking': modified_ranking[:5]  # Top 5 for brevity
+                    'new_ranking': modified_ranking  # Top 5 for brevity
                 }
                 
                 variations.append(variation_result)
-                ranking_changes.append(ranking_change_count)
-                score_changes.append(abs(score_changes_dict.get('average_change', 0)))
-                top_country_changes.append(top_country_changed)
+                score_change = abs(score_changes_dict.get('average_change', 0))
+                count += 1
+                ranking_change_sum += ranking_change_count
+                ranking_change_max = max(ranking_change_max, ranking_change_count)
+                score_change_sum += score_change
+                score_change_max = max(score_change_max, score_change)
+                top_country_change_count += top_country_changed
                 
             except Exception as e:
                 logger.warning(f"Failed to analyze variation {variation} for {weight_name}: {str(e)}")
@@ -146,60 +241,147 @@ class AnalyticsService:
         return {
             'variations': variations,
             'sensitivity_metrics': {
-                'average_ranking_changes': np.mean(ranking_changes) if ranking_changes else 0,
-                'max_ranking_changes': max(ranking_changes) if ranking_changes else 0,
-                'average_score_change': np.mean(score_changes) if score_changes else 0,
-                'max_score_change': max(score_changes) if score_changes else 0,
-                'top_country_change_frequency': sum(top_country_changes) / len(top_country_changes) if top_country_changes else 0,
-                'stability_score': self._calculate_stability_score(ranking_changes, score_changes)
+                'average_ranking_changes': ranking_change_sum / count if count else 0,
+                'max_ranking_changes': ranking_change_max,
+                'average_score_change': score_change_sum / count if count else 0,
+                'max_score_change': score_change_max,
+                'top_country_change_frequency': top_country_change_count / count if count else 0,
+                'stability_score': self._calculate_stability_score(
+                    ranking_change_sum, score_change_sum, count
+                )
             }
         }
     
-    def _count_ranking_changes(self, baseline: List[str], modified: List[str]) -> int:
-        """Count number of position changes in ranking"""
-        changes = 0
-        for i, country in enumerate(baseline):
-            try:
-                new_position = modified.index(country)
-                if new_position != i:
-                    changes += 1
-            except ValueError:
-                # Country not found in modified ranking (shouldn't happen)
-                changes += 1
-        return changes
+    def perform_monte_carlo_analysis(self,
+                                     data: Dict[str, List[float]],
+                                     base_weights: Dict[str, float],
+                                     country_names: List[str],
+                                     n_samples: int = 1000,
+                                     perturbation: float = 0.05,
+                                     seed: Optional[int] = None) -> Dict:
+        """
+        Monte Carlo sensitivity analysis: perturb every weight at once by a
+        uniform factor in [1 - perturbation, 1 + perturbation] and score all
+        samples in batched matmuls
+        
+        Args:
+            data: Country data for each criterion
+            base_weights: Base weight configuration
+            country_names: List of country names
+            n_samples: Number of random weight vectors to draw
+            perturbation: Maximum relative change of each weight
+            seed: Non-negative integer seed for reproducible draws (optional)
+        
+        Returns:
+            Aggregated rank statistics per country; individual samples are not kept
+        """
+        if type(n_samples) is not int or not 1 <= n_samples <= MAX_MONTE_CARLO_SAMPLES:
+            raise ValueError(f"n_samples must be an integer between 1 and {MAX_MONTE_CARLO_SAMPLES}")
+        if not isinstance(perturbation, (int, float)) or not 0 <= perturbation < 1:
+            raise ValueError("perturbation must be a number in [0, 1)")
+        if seed is not None and (type(seed) is not int or seed < 0):
+            raise ValueError("seed must be a non-negative integer or null")
+        
+        criteria_order, normalized_matrix = self._get_normalized_matrix(data)
+        base = np.fromiter(
+            (base_weights.get(criterion + '_weight', 0.0) for criterion in criteria_order),
+            dtype=np.float64, count=len(criteria_order)
+        )
+        num_countries = normalized_matrix.shape[0]
+        
+        # Baseline ranks (0 = best), ties keep input order as in SAW analysis
+        baseline_scores = np.round(normalized_matrix @ base, RANK_DECIMALS)
+        baseline_order = np.argsort(-baseline_scores, kind='stable')
+        baseline_ranks = np.empty(num_countries, dtype=np.intp)
+        baseline_ranks[baseline_order] = np.arange(num_countries)
+        
+        # Running rank aggregates per country
+        top_counts = np.zeros(num_countries, dtype=np.int64)
+        rank_sum = np.zeros(num_countries)
+        rank_sq_sum = np.zeros(num_countries)
+        best_rank = np.full(num_countries, num_countries, dtype=np.intp)
+        worst_rank = np.zeros(num_countries, dtype=np.intp)
+        
+        rng = np.random.default_rng(seed)
+        for start in range(0, n_samples, MONTE_CARLO_CHUNK_SIZE):
+            size = min(MONTE_CARLO_CHUNK_SIZE, n_samples - start)
+            weights_matrix = base * (1 + rng.uniform(-perturbation, perturbation, size=(size, len(base))))
+            
+            scores = self.saw_service.analyze_batch(normalized_matrix, weights_matrix)
+            order = np.argsort(-np.round(scores, RANK_DECIMALS), axis=0, kind='stable')
+            ranks = np.empty_like(order)
+            np.put_along_axis(ranks, order, np.arange(num_countries)[:, None], axis=0)
+            
+            top_counts += np.bincount(order[0], minlength=num_countries)
+            rank_sum += ranks.sum(axis=1)
+            rank_sq_sum += np.square(ranks, dtype=np.float64).sum(axis=1)
+            np.minimum(best_rank, ranks.min(axis=1), out=best_rank)
+            np.maximum(worst_rank, ranks.max(axis=1), out=worst_rank)
+        
+        mean_rank = rank_sum / n_samples
+        rank_std = np.sqrt(np.maximum(rank_sq_sum / n_samples - mean_rank ** 2, 0.0))
+        top_probability = top_counts / n_samples
+        
+        country_statistics = [{
+            'country': country_names[i],
+            'baseline_rank': int(baseline_ranks[i]) + 1,
+            'mean_rank': round(float(mean_rank[i]) + 1, 4),
+            'rank_std': round(float(rank_std[i]), 4),
+            'best_rank': int(best_rank[i]) + 1,
+            'worst_rank': int(worst_rank[i]) + 1,
+            'top_probability': round(float(top_probability[i]), 4)
+        } for i in baseline_order.tolist()]
+        
+        baseline_top = int(baseline_order[0]) if num_countries else None
+        
+        return {
+            'n_samples': n_samples,
+            'perturbation': perturbation,
+            'baseline_top_country': country_names[baseline_top] if baseline_top is not None else None,
+            'top_country_stability': round(float(top_probability[baseline_top]), 4) if baseline_top is not None else 0.0,
+            'country_statistics': country_statistics
+        }
     
-    def _calculate_score_changes(self, baseline_scores: Dict[str, float], 
-                               modified_scores: Dict[str, float]) -> Dict[str, float]:
-        """Calculate score changes between baseline and modified analysis"""
-        changes = []
-        country_changes = {}
-        
-        for country, baseline_score in baseline_scores.items():
-            if country in modified_scores:
-                change = modified_scores[country] - baseline_score
-                changes.append(abs(change))
-                country_changes[country] = change
+    def _get_normalized_matrix(self, data: Dict[str, List[float]]) -> Tuple[List[str], np.ndarray]:
+        """Get the normalized decision matrix for data, reusing it across criterion loops"""
+        cached = self._normalized_cache
+        if cached is not None and cached[0] == id(data) and cached[1] is data:
+            return cached[2], cached[3]
+        
+        criteria_order, normalized_matrix = self.saw_service.normalize_matrix(data)
+        self._normalized_cache = (id(data), data, criteria_order, normalized_matrix)
+        return criteria_order, normalized_matrix
+    
+    def _calculate_score_changes(self, baseline_scores: np.ndarray, 
+                               modified_scores: np.ndarray,
+                               countries: List[str]) -> Dict[str, float]:
+        """Calculate score changes between baseline and modified analysis (arrays aligned with countries)"""
+        if not countries:
+            return {'average_change': 0, 'max_change': 0, 'min_change': 0, 'country_changes': {}}
+        
+        diff = modified_scores - baseline_scores
+        abs_diff = np.abs(diff)
         
         return {
-            'average_change': np.mean(changes) if changes else 0,
-            'max_change': max(changes) if changes else 0,
-            'min_change': min(changes) if changes else 0,
-            'country_changes': country_changes
+            'average_change': float(abs_diff.mean()),
+            'max_change': float(abs_diff.max()),
+            'min_change': float(abs_diff.min()),
+            'country_changes': dict(zip(countries, diff.tolist()))
         }
     
-    def _calculate_stability_score(self, ranking_changes: List[int], 
-                                 score_changes: List[float]) -> float:
-        """Calculate stability score (0-100, higher = more stable)"""
-        if not ranking_changes or not score_changes:
+    def _calculate_stability_score(self, ranking_change_sum: int,
+                                 score_change_sum: float, count: int) -> float:
+        """Calculate stability score (0-100, higher = more stable) from accumulated sums"""
+        if not count:
             return 100.0
         
         # Normalize ranking changes (assume max possible changes = number of countries)
         max_possible_changes = 10  # Reasonable assumption
-        normalized_ranking_stability = 1 - (np.mean(ranking_changes) / max_possible_changes)
+        normalized_ranking_stability = 1 - (ranking_change_sum / count) / max_possible_changes
         
         # Normalize score changes (assume reasonable max change = 2.0)
         max_reasonable_score_change = 2.0
-        normalized_score_stability = 1 - min(np.mean(score_changes) / max_reasonable_score_change, 1.0)
+        normalized_score_stability = 1 - min((score_change_sum / count) / max_reasonable_score_change, 1.0)
         
         # Combined stability score (equal weights)
         stability = ((normalized_ranking_stability + normalized_score_stability) / 2) * 100
@@ -207,40 +389,39 @@ class AnalyticsService:
     
     def _calculate_overall_sensitivity(self, sensitivity_results: Dict) -> Dict:
         """Calculate overall sensitivity metrics across all criteria"""
-        all_stability_scores = []
-        all_ranking_changes = []
-        all_score_changes = []
-        most_sensitive_criterion = None
-        least_sensitive_criterion = None
-        min_stability = float('inf')
-        max_stability = 0
+        criteria = list(sensitivity_results)
+        if not criteria:
+            return {
+                'overall_stability_score': 100,
+                'most_sensitive_criterion': None,
+                'least_sensitive_criterion': None,
+                'average_ranking_changes': 0,
+                'average_score_changes': 0,
+                'sensitivity_distribution': {
+                    'high_sensitivity': 0,
+                    'medium_sensitivity': 0,
+                    'low_sensitivity': 0
+                }
+            }
         
-        for criterion, results in sensitivity_results.items():
-            metrics = results['sensitivity_metrics']
-            stability = metrics['stability_score']
-            
-            all_stability_scores.append(stability)
-            all_ranking_changes.append(metrics['average_ranking_changes'])
-            all_score_changes.append(metrics['average_score_change'])
-            
-            if stability < min_stability:
-                min_stability = stability
-                most_sensitive_criterion = criterion
-            
-            if stability > max_stability:
-                max_stability = stability
-                least_sensitive_criterion = criterion
+        metrics = [sensitivity_results[criterion]['sensitivity_metrics'] for criterion in criteria]
+        stability = np.fromiter((m['stability_score'] for m in metrics), dtype=np.float64, count=len(criteria))
+        ranking_changes = np.fromiter((m['average_ranking_changes'] for m in metrics), dtype=np.float64, count=len(criteria))
+        score_changes = np.fromiter((m['average_score_change'] for m in metrics), dtype=np.float64, count=len(criteria))
+        
+        # Buckets: < 70 high, 70-85 medium, >= 85 low sensitivity
+        high, medium, low = np.bincount(np.digitize(stability, [70, 85]), minlength=3).tolist()
         
         return {
-            'overall_stability_score': np.mean(all_stability_scores) if all_stability_scores else 100,
-            'most_sensitive_criterion': most_sensitive_criterion,
-            'least_sensitive_criterion': least_sensitive_criterion,
-            'average_ranking_changes': np.mean(all_ranking_changes) if all_ranking_changes else 0,
-            'average_score_changes': np.mean(all_score_changes) if all_score_changes else 0,
+            'overall_stability_score': float(stability.mean()),
+            'most_sensitive_criterion': criteria[int(stability.argmin())],
+            'least_sensitive_criterion': criteria[int(stability.argmax())] if stability.max() > 0 else None,
+            'average_ranking_changes': float(ranking_changes.mean()),
+            'average_score_changes': float(score_changes.mean()),
             'sensitivity_distribution': {
-                'high_sensitivity': sum(1 for s in all_stability_scores if s < 70),
-                'medium_sensitivity': sum(1 for s in all_stability_scores if 70 <= s < 85),
-                'low_sensitivity': sum(1 for s in all_stability_scores if s >= 85)
+                'high_sensitivity': high,
+                'medium_sensitivity': medium,
+                'low_sensitivity': low
             }
         }
     
@@ -285,8 +466,7 @@ class AnalyticsService:
         """
         try:
             # Get all countries
-            all_countries = self.country_manager.get_all_countries()
-            country_dict = {country.name: country for country in all_countries}
+            country_dict, country_frame = self._get_country_table()
             
             # Filter requested countries
             comparison_countries = []
@@ -319,33 +499,28 @@ class AnalyticsService:
                 country_data = country.to_dict()
                 comparison_data['countries'].append(country_data)
             
-            # Build criteria comparison
-            for criterion in criteria:
-                values = []
-                country_values = {}
-                
-                for country in comparison_countries:
-                    value = getattr(country, criterion, 0)
-                    values.append(value)
-                    country_values[country.name] = value
-                
+            # Build criteria comparison from a (criteria, countries) value matrix
+            names = [country.name for country in comparison_countries]
+            values = country_frame.loc[names].reindex(columns=criteria, fill_value=0) \
+                .to_numpy(dtype=np.float64).T.reshape(len(criteria), len(names))
+            
+            best_idx = values.argmax(axis=1)
+            worst_idx = values.argmin(axis=1)
+            averages = values.mean(axis=1)
+            ranges = np.ptp(values, axis=1)
+            orders = np.argsort(-values, axis=1, kind='stable')
+            
+            for i, criterion in enumerate(criteria):
                 comparison_data['criteria_comparison'][criterion] = {
-                    'values': country_values,
-                    'best_country': max(country_values.keys(), key=lambda k: country_values[k]) if values else None,
-                    'worst_country': min(country_values.keys(), key=lambda k: country_values[k]) if values else None,
-                    'average': np.mean(values) if values else 0,
-                    'range': max(values) - min(values) if values else 0
+                    'values': dict(zip(names, values[i].tolist())),
+                    'best_country': names[best_idx[i]],
+                    'worst_country': names[worst_idx[i]],
+                    'average': float(averages[i]),
+                    'range': float(ranges[i])
                 }
-            
-            # Calculate relative rankings for each criterion
-            for criterion in criteria:
-                criterion_data = comparison_data['criteria_comparison'][criterion]
-                sorted_countries = sorted(
-                    criterion_data['values'].items(), 
-                    key=lambda x: x[1], 
-                    reverse=True
-                )
-                comparison_data['rankings'][criterion] = [country for country, _ in sorted_countries]
+                
+                # Relative ranking for this criterion
+                comparison_data['rankings'][criterion] = [names[j] for j in orders[i]]
             
             # Calculate statistics
             comparison_data['statistics'] = {
@@ -361,11 +536,27 @@ class AnalyticsService:
             logger.error(f"Country comparison failed: {str(e)}")
             raise Exception(f"Country comparison error: {str(e)}")
     
+    def _get_country_table(self) -> Tuple[Dict[str, Any], pd.DataFrame]:
+        """Get countries by name plus a name-indexed attribute frame, rebuilt only after mutations"""
+        # Same stamp as the manager's cache, so writes by other workers invalidate it too
+        version = self.country_manager.data_stamp()
+        if self._country_cache is not None and self._country_cache[0] == version:
+            return self._country_cache[1], self._country_cache[2]
+        
+        all_countries = self.country_manager.get_all_countries()
+        country_dict = {country.name: country for country in all_countries}
+        # Wrap the manager's shared criteria slab instead of one record per country
+        names, matrix = self.country_manager.get_country_matrix()
+        country_frame = pd.DataFrame(matrix, index=pd.Index(names, name='name'), columns=CRITERIA, copy=False)
+        
+        self._country_cache = (version, country_dict, country_frame)
+        return country_dict, country_frame
+    
     def get_system_statistics(self) -> Dict:
         """Get comprehensive system statistics"""
         try:
             # Database statistics
-            db_stats = self.country_manager.get_statistics()
+            db_stats = self.country_manager.get_statistics(include_names=True)
             
             # Analysis statistics (from decision_results table)
             analysis_stats = self._get_analysis_statistics()
@@ -393,58 +584,82 @@ class AnalyticsService:
             }
     
     def _get_analysis_statistics(self) -> Dict:
-        """Get statistics about system usage and analyses"""
+        """Get statistics about system usage and analyses, reused within a short TTL window"""
+        bucket = int(time.time() // ANALYSIS_STATS_TTL)
+        cached = self._analysis_stats_cache
+        if cached is not None and cached[0] == bucket:
+            return cached[1]
+        
+        stats = self._query_analysis_statistics()
+        if stats is not None:
+            self._analysis_stats_cache = (bucket, stats)
+            return stats
+        
+        return {
+            'total_analyses': 0,
+            'recent_analyses_30d': 0,
+            'unique_sessions': 0,
+            'most_recommended_countries': {}
+        }
+    
+    def _query_analysis_statistics(self) -> Optional[Dict]:
+        """Aggregate usage statistics from decision_results (None if unavailable)"""
         try:
-            conn = self.decision_manager.get_connection()
-            
-            # Total analyses
-            cursor = conn.execute('SELECT COUNT(*) FROM decision_results')
-            total_analyses = cursor.fetchone()[0]
+            self.decision_manager.flush_pending_results()
+            conn = self._conn()
             
-            # Analyses in last 30 days
+            # Total analyses, analyses in last 30 days and unique sessions in one pass
             thirty_days_ago = (datetime.now() - timedelta(days=30)).isoformat()
-            cursor = conn.execute(
-                'SELECT COUNT(*) FROM decision_results WHERE created_at > ?', 
-                (thirty_days_ago,)
-            )
-            recent_analyses = cursor.fetchone()[0]
-            
-            # Unique sessions
-            cursor = conn.execute('SELECT COUNT(DISTINCT session_id) FROM decision_results')
-            unique_sessions = cursor.fetchone()[0]
+            cursor = conn.execute('''
+                SELECT COUNT(*),
+                       COUNT(CASE WHEN created_at > ? THEN 1 END),
+                       COUNT(DISTINCT session_id)
+                FROM decision_results
+            ''', (thirty_days_ago,))
+            total_analyses, recent_analyses, unique_sessions = cursor.fetchone()
             
             # Most popular top countries (from analysis results)
-            cursor = conn.execute('SELECT country_scores FROM decision_results')
-            results = cursor.fetchall()
-            
-            top_countries = {}
-            for row in results:
-                try:
-                    scores = json.loads(row[0])
-                    if scores and len(scores) > 0:
-                        top_country = scores[0].get('country')
-                        if top_country:
-                            top_countries[top_country] = top_countries.get(top_country, 0) + 1
-                except:
-                    continue
-            
-            conn.close()
+            if self._has_json1:
+                cursor = conn.execute('''
+                    SELECT json_extract(country_scores, '$[0].country') AS top_country, COUNT(*) AS n
+                    FROM decision_results
+                    WHERE json_valid(country_scores) AND top_country IS NOT NULL
+                    GROUP BY top_country
+                    ORDER BY n DESC, MIN(id)
+                    LIMIT 5
+                ''')
+                top_countries = {row[0]: row[1] for row in cursor.fetchall()}
+            else:
+                cursor = conn.execute('SELECT country_scores FROM decision_results ORDER BY id')
+                counts = Counter()
+                while True:
+                    chunk = cursor.fetchmany(FETCH_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    counts.update(top for top in map(self._top_country, chunk) if top is not None)
+                top_countries = dict(counts.most_common(5))
             
             return {
                 'total_analyses': total_analyses,
                 'recent_analyses_30d': recent_analyses,
                 'unique_sessions': unique_sessions,
-                'most_recommended_countries': dict(sorted(top_countries.items(), key=lambda x: x[1], reverse=True)[:5])
+                'most_recommended_countries': top_countries
             }
             
         except Exception as e:
             logger.warning(f"Could not retrieve analysis statistics: {str(e)}")
-            return {
-                'total_analyses': 0,
-                'recent_analyses_30d': 0,
-                'unique_sessions': 0,
-                'most_recommended_countries': {}
-            }
+            return None
+    
+    @staticmethod
+    def _top_country(row) -> Optional[str]:
+        """Extract the top-ranked country from a stored country_scores row"""
+        try:
+            scores = _json.loads(row[0])
+        except (TypeError, ValueError):
+            return None
+        if isinstance(scores, list) and scores and isinstance(scores[0], dict):
+            return scores[0].get('country')
+        return None
     
     def _get_performance_statistics(self) -> Dict:
         """Get basic performance statistics"""
@@ -7,10 +7,132 @@ import numpy as np
 from typing import Dict, List, Tuple, Optional
 from models.decision import DecisionResult, CriteriaType
 from dataclasses import dataclass
+from functools import cached_property
 import logging
 
 logger = logging.getLogger(__name__)
 
+try:
+    from numba import njit
+except ImportError:  # numba is an optional accelerator
+    njit = None
+
+# Normalization method codes understood by the fused SAW kernel
+_METHOD_CODES = {'min_max': 0, 'z_score': 1, 'vector': 2}
+
+# Decision matrices with fewer cells than this stay on the NumPy path
+FUSED_KERNEL_MIN_SIZE = 4096
+
+# Decimals scores are rounded to before ranking, so summation-order noise between
+# the NumPy and fused paths (or BLAS kernels) cannot split scores that tie exactly
+RANK_DECIMALS = 10
+
+
+def _min_max_kernel_numpy(matrix: np.ndarray, benefit_mask: np.ndarray) -> np.ndarray:
+    """Column-wise min-max normalization of a (countries, criteria) matrix"""
+    min_vals = matrix.min(axis=0)
+    max_vals = matrix.max(axis=0)
+    value_range = max_vals - min_vals
+    safe_range = np.where(value_range == 0, 1.0, value_range)
+    
+    normalized = np.where(benefit_mask, matrix - min_vals, max_vals - matrix) / safe_range
+    return np.where(value_range == 0, 1.0, normalized)
+
+
+def _min_max_kernel_loop(matrix, benefit_mask):
+    """Single-pass min-max normalization, compiled with numba when available"""
+    num_rows, num_cols = matrix.shape
+    normalized = np.empty((num_rows, num_cols))
+    
+    for j in range(num_cols):
+        min_val = matrix[0, j]
+        max_val = matrix[0, j]
+        for i in range(1, num_rows):
+            value = matrix[i, j]
+            if value < min_val:
+                min_val = value
+            if value > max_val:
+                max_val = value
+        
+        value_range = max_val - min_val
+        for i in range(num_rows):
+            if value_range == 0:
+                normalized[i, j] = 1.0
+            elif benefit_mask[j]:
+                normalized[i, j] = (matrix[i, j] - min_val) / value_range
+            else:
+                normalized[i, j] = (max_val - matrix[i, j]) / value_range
+    
+    return normalized
+
+
+def _saw_kernel_loop(matrix, is_cost, method, weights):
+    """Normalize each criterion row, weight it and accumulate country scores in one pass"""
+    num_criteria, num_countries = matrix.shape
+    weighted = np.empty((num_criteria, num_countries))
+    
+    for c in range(num_criteria):
+        row = matrix[c]
+        normalized = np.ones(num_countries)
+        
+        if method == 0:
+            min_val = row.min()
+            max_val = row.max()
+            value_range = max_val - min_val
+            if value_range != 0:
+                if is_cost[c]:
+                    normalized = (max_val - row) / value_range
+                else:
+                    normalized = (row - min_val) / value_range
+        elif method == 1:
+            std_val = row.std()
+            if std_val != 0:
+                z_scores = (row - row.mean()) / std_val
+                min_z = z_scores.min()
+                z_range = z_scores.max() - min_z
+                if z_range != 0:
+                    normalized = (z_scores - min_z) / z_range
+                    if is_cost[c]:
+                        normalized = 1.0 - normalized
+        else:
+            sum_of_squares = np.sum(row * row)
+            if sum_of_squares != 0:
+                normalized = row * (1.0 / np.sqrt(sum_of_squares))
+                if is_cost[c]:
+                    normalized = normalized.max() - normalized
+        
+        weighted[c] = weights[c] * normalized
+    
+    scores = np.zeros(num_countries)
+    for c in range(num_criteria):
+        scores += weighted[c]
+    
+    return scores, weighted
+
+
+if njit is not None:
+    # Serial and without fastmath: request threads call these concurrently, and
+    # strict IEEE arithmetic keeps scores within rounding of the NumPy path
+    _min_max_kernel = njit(cache=True)(_min_max_kernel_loop)
+    _saw_kernel = njit(cache=True)(_saw_kernel_loop)
+else:
+    _min_max_kernel = _min_max_kernel_numpy
+    _saw_kernel = None
+
+
+def _first_invalid_position(values: List[float]) -> Optional[int]:
+    """Index of the first non-numeric or non-finite value, or None if all are valid"""
+    arr = np.asarray(values)
+    if arr.ndim != 1 or arr.dtype.kind not in 'biuf':
+        # Mixed or non-numeric input; locate the offending element
+        for i, value in enumerate(values):
+            if not isinstance(value, (int, float)) or not np.isfinite(value):
+                return i
+        return None
+    
+    invalid = ~np.isfinite(arr)
+    return int(invalid.argmax()) if invalid.any() else None
+
 
 @dataclass
 class NormalizationConfig:
@@ -32,12 +154,14 @@ class SAWService:
             'climate_score': CriteriaType.BENEFIT,
             'safety_index': CriteriaType.BENEFIT
         }
+        self._weight_keys = {criterion: criterion + '_weight' for criterion in self.criteria_types}
     
     def analyze(self, 
                 data: Dict[str, List[float]], 
                 weights: Dict[str, float], 
                 country_names: List[str],
-                config: Optional[NormalizationConfig] = None) -> List[DecisionResult]:
+                config: Optional[NormalizationConfig] = None,
+                top_k: Optional[int] = None) -> List[DecisionResult]:
         """
         Perform SAW analysis with comprehensive error handling and validation
         
@@ -46,6 +170,7 @@ class SAWService:
             weights: User-defined weights for each criterion
             country_names: List of country names
             config: Normalization configuration (optional)
+            top_k: Only rank and return the best ``top_k`` countries (optional)
         
         Returns:
             List of DecisionResult objects sorted by score (descending)
@@ -62,19 +187,28 @@ class SAWService:
             if config is None:
                 config = NormalizationConfig(criteria_types=self.criteria_types)
             
-            # Data preprocessing
-            processed_data = self._preprocess_data(data)
+            # Convert once to a (num_criteria, num_countries) matrix
+            criteria_order, matrix = self._to_matrix(data)
             
-            # Normalize data
-            normalized_data = self._normalize_data(processed_data, config)
+            # Data preprocessing
+            processed_matrix = self._preprocess_data(matrix)
             
-            # Calculate weighted scores
-            results = self._calculate_weighted_scores(
-                normalized_data, weights, country_names
-            )
+            # Normalize data and calculate weighted scores
+            if (_saw_kernel is not None and config.method in _METHOD_CODES
+                    and processed_matrix.size >= FUSED_KERNEL_MIN_SIZE):
+                scores, weighted, scored_criteria = self._calculate_fused_scores(
+                    criteria_order, processed_matrix, weights, config
+                )
+            else:
+                normalized_matrix = self._normalize_data(processed_matrix, criteria_order, config)
+                scores, weighted, scored_criteria = self._calculate_weighted_scores(
+                    criteria_order, normalized_matrix, weights
+                )
             
             # Post-process results
-            final_results = self._post_process_results(results)
+            final_results = self._post_process_results(
+                scores, weighted, scored_criteria, country_names, top_k
+            )
             
             logger.info(f"SAW analysis completed for {len(country_names)} countries")
             return final_results
@@ -108,192 +242,250 @@ class SAWService:
             if len(values) != num_countries:
                 raise ValueError(f"Data length mismatch for {criterion}: expected {num_countries}, got {len(values)}")
             
-            # Check for non-numeric values
-            for i, value in enumerate(values):
-                if not isinstance(value, (int, float)) or np.isnan(value):
-                    raise ValueError(f"Invalid value for {criterion} at position {i}: {value}")
+            # Check for non-numeric or non-finite values
+            position = _first_invalid_position(values)
+            if position is not None:
+                raise ValueError(f"Invalid value for {criterion} at position {position}: {values[position]}")
         
         # Validate weights
-        for weight_name, weight_value in weights.items():
-            if not isinstance(weight_value, (int, float)) or np.isnan(weight_value):
-                raise ValueError(f"Invalid weight value for {weight_name}: {weight_value}")
-            
-            if weight_value < 0:
-                raise ValueError(f"Weight for {weight_name} cannot be negative: {weight_value}")
+        weight_names = list(weights.keys())
+        weight_values = list(weights.values())
+        position = _first_invalid_position(weight_values)
+        if position is not None:
+            raise ValueError(f"Invalid weight value for {weight_names[position]}: {weight_values[position]}")
+        
+        negative = np.asarray(weight_values, dtype=np.float64) < 0
+        if negative.any():
+            position = int(negative.argmax())
+            raise ValueError(f"Weight for {weight_names[position]} cannot be negative: {weight_values[position]}")
         
         # Check for duplicate country names
         if len(set(country_names)) != len(country_names):
             raise ValueError("Duplicate country names found")
     
-    def _preprocess_data(self, data: Dict[str, List[float]]) -> Dict[str, List[float]]:
+    def _to_matrix(self, data: Dict[str, List[float]]) -> Tuple[List[str], np.ndarray]:
+        """Convert criterion data into (criteria order, matrix of shape (num_criteria, num_countries))"""
+        criteria_order = list(data.keys())
+        matrix = np.array([data[criterion] for criterion in criteria_order], dtype=np.float64)
+        return criteria_order, matrix
+    
+    def _preprocess_data(self, matrix: np.ndarray) -> np.ndarray:
         """Preprocess data before normalization"""
-        processed_data = {}
-        
-        for criterion, values in data.items():
-            # Handle outliers (optional - using IQR method)
-            cleaned_values = self._handle_outliers(values)
-            processed_data[criterion] = cleaned_values
-        
-        return processed_data
+        # Handle outliers (optional - using IQR method)
+        return self._handle_outliers(matrix)
     
-    def _handle_outliers(self, values: List[float], method: str = 'iqr') -> List[float]:
-        """Handle outliers in data (optional preprocessing step)"""
+    def _handle_outliers(self, matrix: np.ndarray, method: str = 'iqr') -> np.ndarray:
+        """Handle outliers in each criterion row (optional preprocessing step)"""
         if method == 'iqr':
-            q1 = np.percentile(values, 25)
-            q3 = np.percentile(values, 75)
+            q1, q3 = np.quantile(matrix, [0.25, 0.75], axis=1, keepdims=True)
             iqr = q3 - q1
-            lower_bound = q1 - 1.5 * iqr
-            upper_bound = q3 + 1.5 * iqr
             
             # Cap outliers instead of removing them
-            capped_values = []
-            for value in values:
-                if value < lower_bound:
-                    capped_values.append(lower_bound)
-                elif value > upper_bound:
-                    capped_values.append(upper_bound)
-                else:
-                    capped_values.append(value)
-            
-            return capped_values
+            return np.clip(matrix, q1 - 1.5 * iqr, q3 + 1.5 * iqr)
         
-        return values  # No outlier handling
+        return matrix  # No outlier handling
     
     def _normalize_data(self, 
-                       data: Dict[str, List[float]], 
-                       config: NormalizationConfig) -> Dict[str, List[float]]:
-        """Normalize data using specified method"""
-        normalized_data = {}
-        
-        for criterion, values in data.items():
+                       matrix: np.ndarray, 
+                       criteria_order: List[str],
+                       config: NormalizationConfig) -> np.ndarray:
+        """Normalize each criterion row of the matrix using specified method"""
+        is_cost = self._cost_mask(criteria_order, config)
+        
+        if config.method == 'min_max':
+            return self._min_max_normalize(matrix, is_cost)
+        elif config.method == 'z_score':
+            return self._z_score_normalize(matrix, is_cost)
+        elif config.method == 'vector':
+            return self._vector_normalize(matrix, is_cost)
+        else:
+            raise ValueError(f"Unknown normalization method: {config.method}")
+    
+    def _cost_mask(self, criteria_order: List[str], config: NormalizationConfig) -> np.ndarray:
+        """Boolean mask of cost criteria aligned with the matrix rows"""
+        is_cost = np.empty(len(criteria_order), dtype=bool)
+        for i, criterion in enumerate(criteria_order):
             if criterion not in config.criteria_types:
                 logger.warning(f"Criteria type not defined for {criterion}, assuming BENEFIT")
-                criteria_type = CriteriaType.BENEFIT
-            else:
-                criteria_type = config.criteria_types[criterion]
-            
-            if config.method == 'min_max':
-                normalized_data[criterion] = self._min_max_normalize(values, criteria_type)
-            elif config.method == 'z_score':
-                normalized_data[criterion] = self._z_score_normalize(values, criteria_type)
-            elif config.method == 'vector':
-                normalized_data[criterion] = self._vector_normalize(values, criteria_type)
-            else:
-                raise ValueError(f"Unknown normalization method: {config.method}")
-        
-        return normalized_data
+            is_cost[i] = config.criteria_types.get(criterion) == CriteriaType.COST
+        return is_cost
     
-    def _min_max_normalize(self, values: List[float], criteria_type: CriteriaType) -> List[float]:
-        """Min-Max normalization"""
-        min_val = min(values)
-        max_val = max(values)
-        
-        if max_val == min_val:
-            return [1.0] * len(values)
-        
-        if criteria_type == CriteriaType.COST:
-            # For cost criteria, lower is better
-            return [(max_val - val) / (max_val - min_val) for val in values]
-        else:
-            # For benefit criteria, higher is better
-            return [(val - min_val) / (max_val - min_val) for val in values]
+    def _min_max_normalize(self, matrix: np.ndarray, is_cost: np.ndarray) -> np.ndarray:
+        """Min-Max normalization (lower is better for cost criteria)"""
+        # The kernel works column-wise on a (countries, criteria) layout
+        return _min_max_kernel(np.ascontiguousarray(matrix.T), ~is_cost).T
     
-    def _z_score_normalize(self, values: List[float], criteria_type: CriteriaType) -> List[float]:
-        """Z-score normalization"""
-        mean_val = np.mean(values)
-        std_val = np.std(values)
-        
-        if std_val == 0:
-            return [1.0] * len(values)
-        
-        z_scores = [(val - mean_val) / std_val for val in values]
+    def _z_score_normalize(self, matrix: np.ndarray, is_cost: np.ndarray) -> np.ndarray:
+        """Z-score normalization rescaled to 0-1"""
+        mean_vals = matrix.mean(axis=1, keepdims=True)
+        std_vals = matrix.std(axis=1, keepdims=True)
+        z_scores = (matrix - mean_vals) / np.where(std_vals == 0, 1.0, std_vals)
         
         # Convert to positive scale (0-1)
-        min_z = min(z_scores)
-        max_z = max(z_scores)
+        min_z = z_scores.min(axis=1, keepdims=True)
+        z_range = z_scores.max(axis=1, keepdims=True) - min_z
+        normalized = (z_scores - min_z) / np.where(z_range == 0, 1.0, z_range)
         
-        if max_z == min_z:
-            return [1.0] * len(values)
+        # Invert for cost criteria
+        normalized = np.where(is_cost[:, None], 1.0 - normalized, normalized)
         
-        normalized = [(z - min_z) / (max_z - min_z) for z in z_scores]
-        
-        if criteria_type == CriteriaType.COST:
-            # Invert for cost criteria
-            normalized = [1 - val for val in normalized]
-        
-        return normalized
+        return np.where((std_vals == 0) | (z_range == 0), 1.0, normalized)
     
-    def _vector_normalize(self, values: List[float], criteria_type: CriteriaType) -> List[float]:
+    def _vector_normalize(self, matrix: np.ndarray, is_cost: np.ndarray) -> np.ndarray:
         """Vector normalization"""
-        sum_of_squares = sum(val ** 2 for val in values)
-        
-        if sum_of_squares == 0:
-            return [1.0] * len(values)
+        sum_of_squares = np.einsum('ij,ij->i', matrix, matrix)[:, None]
+        normalized = matrix * (1.0 / np.sqrt(np.where(sum_of_squares == 0, 1.0, sum_of_squares)))
         
-        normalized = [val / np.sqrt(sum_of_squares) for val in values]
+        # For cost criteria, we need to invert the preference
+        normalized = np.where(is_cost[:, None], normalized.max(axis=1, keepdims=True) - normalized, normalized)
         
-        if criteria_type == CriteriaType.COST:
-            # For cost criteria, we need to invert the preference
-            max_norm = max(normalized)
-            normalized = [max_norm - val for val in normalized]
-        
-        return normalized
+        return np.where(sum_of_squares == 0, 1.0, normalized)
     
     def _calculate_weighted_scores(self, 
-                                  normalized_data: Dict[str, List[float]], 
-                                  weights: Dict[str, float], 
-                                  country_names: List[str]) -> List[Dict]:
-        """Calculate weighted scores for each country"""
-        num_countries = len(country_names)
-        results = []
+                                  criteria_order: List[str],
+                                  normalized_matrix: np.ndarray, 
+                                  weights: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """
+        Calculate weighted scores for each country
         
-        for i in range(num_countries):
-            total_score = 0.0
-            criteria_scores = {}
-            
-            for criterion, norm_values in normalized_data.items():
-                weight_key = criterion + '_weight'
-                if weight_key in weights:
-                    weight = weights[weight_key]
-                    weighted_score = weight * norm_values[i]
-                    total_score += weighted_score
-                    criteria_scores[criterion] = weighted_score
-                else:
-                    logger.warning(f"No weight found for criterion {criterion}")
-            
-            results.append({
-                'country': country_names[i],
-                'score': total_score,
-                'criteria_scores': criteria_scores
-            })
+        Returns:
+            Tuple of (scores of shape (num_countries,), weighted criterion scores of shape
+            (num_countries, num_scored_criteria), names of the scored criteria)
+        """
+        w, scored_rows = self._weight_vector(criteria_order, weights)
+        
+        scores = w @ normalized_matrix
+        weighted = (normalized_matrix[scored_rows] * w[scored_rows, None]).T
         
-        return results
+        return scores, weighted, [criteria_order[i] for i in scored_rows]
     
-    def _post_process_results(self, results: List[Dict]) -> List[DecisionResult]:
+    def _calculate_fused_scores(self,
+                                criteria_order: List[str],
+                                matrix: np.ndarray,
+                                weights: Dict[str, float],
+                                config: NormalizationConfig) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """Normalize and score a large matrix in the compiled kernel (same outputs as the NumPy path)"""
+        w, scored_rows = self._weight_vector(criteria_order, weights)
+        
+        scores, weighted = _saw_kernel(
+            np.ascontiguousarray(matrix), self._cost_mask(criteria_order, config),
+            _METHOD_CODES[config.method], w
+        )
+        
+        return scores, weighted[scored_rows].T, [criteria_order[i] for i in scored_rows]
+    
+    def _weight_vector(self,
+                       criteria_order: List[str],
+                       weights: Dict[str, float]) -> Tuple[np.ndarray, List[int]]:
+        """Weight vector aligned with the matrix rows and the rows that have a weight"""
+        weight_keys = [self._weight_keys.get(criterion) or criterion + '_weight'
+                       for criterion in criteria_order]
+        missing = set(weight_keys).difference(weights)
+        for criterion, weight_key in zip(criteria_order, weight_keys):
+            if weight_key in missing:
+                logger.warning(f"No weight found for criterion {criterion}")
+        
+        # Criteria without a weight contribute nothing and are left out of the breakdown
+        scored_rows = [i for i, weight_key in enumerate(weight_keys) if weight_key not in missing]
+        w = np.fromiter((weights.get(weight_key, 0.0) for weight_key in weight_keys),
+                        dtype=np.float64, count=len(weight_keys))
+        
+        return w, scored_rows
+    
+    def _post_process_results(self,
+                              scores: np.ndarray,
+                              weighted: np.ndarray,
+                              scored_criteria: List[str],
+                              country_names: List[str],
+                              top_k: Optional[int] = None) -> List[DecisionResult]:
         """Post-process and format results"""
-        # Sort by score (descending)
-        results.sort(key=lambda x: x['score'], reverse=True)
+        rank_scores = np.round(scores, RANK_DECIMALS)
+        if top_k is not None and 0 < top_k < len(scores):
+            # Partial selection of the top_k, then sort only those for display.
+            # Countries tied with the k-th score are taken in input order, so the
+            # result is always a prefix of the full stable ranking
+            kth_score = -np.partition(-rank_scores, top_k - 1)[top_k - 1]
+            above = np.flatnonzero(rank_scores > kth_score)
+            tied = np.flatnonzero(rank_scores == kth_score)[:top_k - len(above)]
+            order = np.concatenate((above, tied))
+            order = order[np.argsort(-rank_scores[order], kind='stable')]
+        else:
+            # Sort by score (descending), ties keep input order
+            order = np.argsort(-rank_scores, kind='stable')
+        
+        ranked_scores = scores[order]
         
         # Calculate percentages relative to top score
-        max_score = results[0]['score'] if results else 1.0
+        max_score = float(ranked_scores[0]) if len(ranked_scores) else 1.0
         if max_score == 0:
             max_score = 1.0
         
+        # Round scores (4 places) and percentages (2 places) for every country at once
+        rounded_scores = np.round(ranked_scores, 4).tolist()
+        percentages = np.round((ranked_scores / max_score) * 100, 2).tolist()
+        
+        # One contiguous row of weighted criterion scores per ranked country
+        weighted_rows = weighted[order]
+        scored_criteria = tuple(scored_criteria)
+        
         # Create DecisionResult objects
         decision_results = []
-        for rank, result in enumerate(results, 1):
+        for rank, (i, score, percentage, weighted_row) in enumerate(
+                zip(order.tolist(), rounded_scores, percentages, weighted_rows), 1):
             decision_results.append(DecisionResult(
-                country=result['country'],
-                score=round(result['score'], 4),
+                country=country_names[i],
+                score=score,
                 rank=rank,
-                percentage=round((result['score'] / max_score) * 100, 2),
-                criteria_scores=result['criteria_scores']
+                percentage=percentage,
+                criteria_scores_row=weighted_row,
+                criteria_order=scored_criteria
             ))
         
         return decision_results
-    
+
+    def normalize_matrix(self,
+                         data: Dict[str, List[float]],
+                         config: Optional[NormalizationConfig] = None) -> Tuple[List[str], np.ndarray]:
+        """
+        Preprocess and normalize data into a dense decision matrix
+
+        Args:
+            data: Country data for each criterion
+            config: Normalization configuration (optional)
+
+        Returns:
+            Tuple of (criteria order, matrix of shape (num_countries, num_criteria))
+        """
+        if config is None:
+            config = NormalizationConfig(criteria_types=self.criteria_types)
+
+        criteria_order, matrix = self._to_matrix(data)
+        normalized = self._normalize_data(self._preprocess_data(matrix), criteria_order, config)
+
+        return criteria_order, normalized.T
+
+    def analyze_batch(self,
+                      normalized_matrix: np.ndarray,
+                      weights_matrix: np.ndarray) -> np.ndarray:
+        """
+        Score every country under several weight vectors at once
+
+        Args:
+            normalized_matrix: Normalized decision matrix of shape (num_countries, num_criteria)
+            weights_matrix: One weight vector per row, shape (num_vectors, num_criteria)
+
+        Returns:
+            Score matrix of shape (num_countries, num_vectors)
+        """
+        return normalized_matrix @ weights_matrix.T
+
     def get_method_info(self) -> Dict:
         """Get information about the SAW method"""
+        return self._method_info
+    
+    @cached_property
+    def _method_info(self) -> Dict:
+        """Method description, built once per service since it never changes"""
         return {
             'name': 'Simple Additive Weighting (SAW)',
             'description': 'A multi-criteria decision analysis method that calculates a weighted sum of normalized criteria values',
@@ -0,0 +1,39 @@
+"""
+Shared pytest fixtures.
+
+Every module under test opens 'dss.db' relative to the working directory
+(the blueprint services already do so at import), so the whole session runs
+in a scratch directory created before anything is imported.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+os.chdir(tempfile.mkdtemp(prefix='dss-tests-'))
+
+import app as legacy  # noqa: E402
+from flask import Flask  # noqa: E402
+
+legacy.init_database()
+
+import routes  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def legacy_client():
+    """Test client for the monolithic app.py application"""
+    return legacy.app.test_client()
+
+
+@pytest.fixture(scope='session')
+def client():
+    """Test client for an app serving the api and data blueprints"""
+    application = Flask('dss-tests')
+    application.register_blueprint(routes.api_bp)
+    application.register_blueprint(routes.data_bp)
+    return application.test_client()
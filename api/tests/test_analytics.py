@@ -0,0 +1,108 @@
+"""Tests for AnalyticsService"""
+
+import json
+import sqlite3
+import uuid
+
+import numpy as np
+import pytest
+
+import app as legacy
+import routes
+from models.country import CRITERIA
+from services import analytics
+
+
+@pytest.fixture
+def service():
+    return routes.analytics_service
+
+
+@pytest.fixture
+def countries():
+    return routes.country_manager.get_countries_data_for_analysis()
+
+
+def _weights(scale=1.0):
+    return {criterion + '_weight': scale for criterion in CRITERIA}
+
+
+def test_country_table_sees_writes_from_other_connections(service):
+    service._get_country_table()
+    name = f'Elsewhere {uuid.uuid4().hex[:8]}'
+    
+    # Another worker or the legacy app writes through its own connection
+    conn = sqlite3.connect(routes.country_manager.db_path)
+    with conn:
+        conn.execute(
+            f"INSERT INTO countries (name, {', '.join(CRITERIA)}) VALUES (?, {', '.join('?' * len(CRITERIA))})",
+            (name, *[5.0] * len(CRITERIA))
+        )
+    conn.close()
+    
+    country_dict, country_frame = service._get_country_table()
+    assert name in country_dict
+    assert name in country_frame.index
+
+
+def test_monte_carlo_without_perturbation_keeps_baseline(service, countries):
+    data, names = countries
+    
+    result = service.perform_monte_carlo_analysis(data, _weights(), names, n_samples=50, perturbation=0.0, seed=1)
+    
+    assert result['top_country_stability'] == 1.0
+    for entry in result['country_statistics']:
+        assert entry['best_rank'] == entry['worst_rank'] == entry['baseline_rank']
+        assert entry['mean_rank'] == entry['baseline_rank']
+        assert entry['rank_std'] == 0.0
+
+
+def test_monte_carlo_statistics_are_consistent(service, countries):
+    data, names = countries
+    
+    result = service.perform_monte_carlo_analysis(data, _weights(), names, n_samples=500, perturbation=0.3, seed=2)
+    
+    stats = result['country_statistics']
+    assert sorted(entry['country'] for entry in stats) == sorted(names)
+    assert [entry['baseline_rank'] for entry in stats] == list(range(1, len(names) + 1))
+    assert sum(entry['top_probability'] for entry in stats) == pytest.approx(1.0, abs=1e-3)
+    assert all(entry['best_rank'] <= entry['mean_rank'] <= entry['worst_rank'] for entry in stats)
+
+
+def test_usage_statistics_match_without_json1(monkeypatch):
+    service = analytics.AnalyticsService()
+    conn = sqlite3.connect('dss.db')
+    with conn:
+        conn.executemany('INSERT INTO decision_results (session_id, country_scores, preferences) VALUES (?, ?, ?)', [
+            ('usage-stats', json.dumps([{'country': 'Canada', 'score': 0.9}]), '{}'),
+            # Rows the json1 query and the Python fallback both have to skip
+            ('usage-bad', 'not json', '{}'),
+            ('usage-empty', '[]', '{}'),
+        ])
+    conn.close()
+    
+    with_json1 = service._query_analysis_statistics()
+    monkeypatch.setattr(service, '_has_json1', False)
+    without_json1 = service._query_analysis_statistics()
+    
+    assert with_json1 == without_json1
+    assert with_json1['total_analyses'] >= 3
+    assert with_json1['most_recommended_countries']
+
+
+@pytest.mark.parametrize('num_countries', [50, 700])
+def test_sensitivity_unchanged_weights_change_no_ranking(service, num_countries):
+    # Integer scores in 0-2 give many exact ties between countries
+    values = np.random.default_rng(4).integers(0, 3, size=(len(CRITERIA), num_countries)).astype(float)
+    data = {criterion: row.tolist() for criterion, row in zip(CRITERIA, values)}
+    names = [f'c{i}' for i in range(num_countries)]
+    
+    weights = dict(zip(_weights(), [1.5, 2.0, 0.5, 1.0, 1.8, 0.8, 1.3]))
+    
+    result = service.perform_sensitivity_analysis(data, weights, names, variation_range=[0.0])
+    
+    for criterion in result['criterion_sensitivity'].values():
+        (variation,) = criterion['variations']
+        assert variation['ranking_changes'] == 0
+        assert variation['top_country_changed'] is False
+        assert variation['new_ranking'] == result['baseline_analysis']['ranking'][:5]
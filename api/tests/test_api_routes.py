@@ -0,0 +1,116 @@
+"""Tests for the /api blueprint"""
+
+import uuid
+
+import pytest
+
+
+WEIGHTS = {
+    'cost_weight': 1.5, 'ranking_weight': 2.0, 'language_weight': 0.5, 'visa_weight': 1.0,
+    'job_weight': 1.8, 'climate_weight': 0.8, 'safety_weight': 1.3
+}
+
+
+def _monte_carlo(client, **options):
+    return client.post('/api/sensitivity/monte_carlo', json=dict(WEIGHTS, n_samples=200, **options))
+
+
+def test_monte_carlo_seed_is_reproducible(client):
+    first = _monte_carlo(client, seed=7)
+    second = _monte_carlo(client, seed=7)
+    
+    assert first.status_code == 200
+    assert first.get_json()['monte_carlo_results'] == second.get_json()['monte_carlo_results']
+
+
+@pytest.mark.parametrize('seed', ['42', 4.2, True, -1, [1]])
+def test_monte_carlo_rejects_invalid_seed(client, seed):
+    response = _monte_carlo(client, seed=seed)
+    
+    assert response.status_code == 400
+    assert 'seed' in response.get_json()['error']
+
+
+def _analyze(client, **options):
+    return client.post('/api/decision/analyze', json=dict(WEIGHTS, **options))
+
+
+def test_analyze_ranks_every_country(client):
+    body = _analyze(client).get_json()
+    
+    results = body['results']
+    assert [result['rank'] for result in results] == list(range(1, len(results) + 1))
+    scores = [result['score'] for result in results]
+    assert scores == sorted(scores, reverse=True)
+    assert results[0]['percentage'] == 100.0
+    assert body['analysis_summary']['top_recommendation'] == results[0]['country']
+
+
+@pytest.mark.parametrize('top_k', [1, 3, 1000])
+def test_analyze_top_k_is_prefix_of_full_ranking(client, top_k):
+    full = _analyze(client).get_json()['results']
+    
+    top = _analyze(client, top_k=top_k).get_json()['results']
+    
+    assert top == full[:top_k]
+
+
+@pytest.mark.parametrize('top_k', [0, -2, '3', 2.5, True])
+def test_analyze_rejects_invalid_top_k(client, top_k):
+    assert _analyze(client, top_k=top_k).status_code == 400
+
+
+def test_preferences_round_trip(client):
+    session_id = f'prefs-{uuid.uuid4().hex[:8]}'
+    
+    saved = client.post('/api/preferences', json=dict(WEIGHTS, session_id=session_id))
+    assert saved.status_code == 201
+    
+    preferences = client.get(f'/api/preferences/{session_id}').get_json()['preferences']
+    assert {key: preferences[key] for key in WEIGHTS} == WEIGHTS
+    assert client.get('/api/preferences/no-such-session').status_code == 404
+
+
+@pytest.mark.parametrize('weight', [-1, 11, 10.5])
+def test_preferences_reject_invalid_weight(client, weight):
+    response = client.post('/api/preferences', json=dict(WEIGHTS, session_id='prefs-invalid', cost_weight=weight))
+    
+    assert response.status_code == 400
+
+
+def test_history_pages_with_keyset_cursor(client):
+    session_id = f'history-{uuid.uuid4().hex[:8]}'
+    for _ in range(5):
+        _analyze(client, session_id=session_id)
+    
+    seen = []
+    params = {'limit': 2}
+    while True:
+        page = client.get(f'/api/history/{session_id}', query_string=params).get_json()
+        seen.extend(entry['id'] for entry in page['history'])
+        if page['next_cursor'] is None:
+            break
+        assert page['count'] == 2
+        params = dict(page['next_cursor'], limit=2)
+    
+    assert len(seen) == 5
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_compare_skips_unknown_countries(client):
+    body = client.post('/api/compare', json={'countries': ['Canada', 'Germany', 'Nowhere']}).get_json()
+    
+    assert body['success'] is True
+    assert [country['name'] for country in body['comparison']['countries']] == ['Canada', 'Germany']
+
+
+def test_sensitivity_analysis_is_repeatable(client):
+    first = client.post('/api/sensitivity/analyze', json=WEIGHTS).get_json()
+    second = client.post('/api/sensitivity/analyze', json=WEIGHTS).get_json()
+    
+    assert first['success'] is True
+    first['sensitivity_results'].pop('analysis_timestamp')
+    second['sensitivity_results'].pop('analysis_timestamp')
+    assert first['sensitivity_results'] == second['sensitivity_results']
+    baseline = first['sensitivity_results']['baseline_analysis']['ranking']
+    assert baseline == [result['country'] for result in _analyze(client).get_json()['results']]
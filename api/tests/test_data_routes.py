@@ -0,0 +1,144 @@
+"""Tests for the /api/data blueprint"""
+
+import csv
+import io
+import uuid
+
+from models.country import CRITERIA
+
+
+def _country(name, **scores):
+    data = {criterion: 5.0 for criterion in CRITERIA}
+    data.update(scores)
+    data['name'] = name
+    return data
+
+
+def _unique(prefix):
+    return f'{prefix} {uuid.uuid4().hex[:8]}'
+
+
+def test_bulk_json_reports_malformed_row_only(client):
+    first, last = _unique('Bulk A'), _unique('Bulk C')
+    response = client.post('/api/data/countries/bulk', json={
+        'countries': [_country(first), _country(5), _country(last)]
+    })
+    
+    assert response.status_code == 200
+    results = response.get_json()
+    assert results['success_count'] == 2
+    assert results['error_count'] == 1
+    assert results['errors'][0]['row'] == 2
+
+
+def _csv(*rows):
+    header = ','.join(('name',) + CRITERIA)
+    return '\n'.join((header,) + rows) + '\n'
+
+
+def _csv_row(name, value=5):
+    return ','.join([name] + [str(value)] * len(CRITERIA))
+
+
+def _names(client, **params):
+    return [country['name'] for country in client.get('/api/data/countries', query_string=params).get_json()['countries']]
+
+
+def test_bulk_csv_column_path_adds_every_row(client):
+    names = [_unique('Csv A'), _unique('Csv B')]
+    response = client.post('/api/data/countries/bulk', json={'csv_data': _csv(*map(_csv_row, names))})
+    
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert results == {'success_count': 2, 'error_count': 0, 'errors': []}
+    assert set(names) <= set(_names(client))
+
+
+def test_bulk_csv_bad_number_reports_that_row(client):
+    good, bad = _unique('Csv Good'), _unique('Csv Bad')
+    csv_data = _csv(_csv_row(good), _csv_row(bad, 'x'))
+    
+    results = client.post('/api/data/countries/bulk', json={'csv_data': csv_data}).get_json()['results']
+    
+    assert results['success_count'] == 1
+    assert results['error_count'] == 1
+    error = results['errors'][0]
+    assert error['row'] == 3
+    assert error['data']['name'] == bad
+    assert good in _names(client)
+
+
+def test_bulk_csv_file_reports_duplicate_name(client):
+    name = _unique('Csv Dup')
+    data = _csv(_csv_row(name), _csv_row(name.upper()))
+    response = client.post('/api/data/countries/bulk', content_type='multipart/form-data',
+                           data={'file': (io.BytesIO(data.encode()), 'countries.csv')})
+    
+    results = response.get_json()['results']
+    assert results['success_count'] == 1
+    assert [error['row'] for error in results['errors']] == [3]
+
+
+def test_countries_sorted_and_paginated(client):
+    everything = client.get('/api/data/countries', query_string={'sort_by': 'safety_index', 'order': 'desc'}).get_json()
+    scores = [country['safety_index'] for country in everything['countries']]
+    assert scores == sorted(scores, reverse=True)
+    assert everything['pagination']['total_available'] == everything['count']
+    
+    page = _names(client, sort_by='safety_index', order='desc', limit=3, offset=2)
+    assert page == [country['name'] for country in everything['countries'][2:5]]
+
+
+def test_countries_unknown_sort_field_uses_name_order(client):
+    names = _names(client, sort_by='created_at; DROP TABLE countries')
+    
+    assert names == _names(client, sort_by='name')
+    assert names == sorted(names, key=str.lower)
+
+
+def test_update_country_checks_only_changed_fields(client):
+    country_id = client.post('/api/data/countries', json=_country(_unique('Update'))).get_json()['country_id']
+    
+    bad = client.put(f'/api/data/countries/{country_id}', json={'safety_index': 11})
+    assert bad.status_code == 400
+    
+    updated = client.put(f'/api/data/countries/{country_id}', json={'safety_index': 9.5})
+    assert updated.status_code == 200
+    assert updated.get_json()['country']['safety_index'] == 9.5
+    
+    assert client.delete(f'/api/data/countries/{country_id}').status_code == 200
+    assert client.get(f'/api/data/countries/{country_id}').status_code == 404
+
+
+def test_add_country_rejects_case_insensitive_duplicate(client):
+    name = _unique('Dup')
+    assert client.post('/api/data/countries', json=_country(name)).status_code == 201
+    
+    response = client.post('/api/data/countries', json=_country(name.lower()))
+    
+    assert response.status_code == 400
+    assert 'already exists' in response.get_json()['error']
+
+
+def test_export_csv_streams_requested_fields(client):
+    countries = client.get('/api/data/export').get_json()['countries']
+    
+    response = client.get('/api/data/export', query_string={'format': 'csv', 'fields': 'name,safety_index'})
+    
+    assert response.mimetype == 'text/csv'
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[0] == ['name', 'safety_index']
+    assert [row[0] for row in rows[1:]] == [country['name'] for country in countries]
+
+
+def test_statistics_match_country_listing(client):
+    body = client.get('/api/data/statistics').get_json()
+    countries = client.get('/api/data/countries').get_json()['countries']
+    
+    assert body['success'] is True
+    stats = body['database_statistics']
+    assert stats['total_countries'] == len(countries)
+    safety = stats['statistics']['safety_index']
+    values = [country['safety_index'] for country in countries]
+    assert safety['min'] == min(values)
+    assert safety['max'] == max(values)
@@ -0,0 +1,114 @@
+"""Tests for DecisionManager result persistence"""
+
+import threading
+import uuid
+
+import numpy as np
+import pytest
+
+from models import decision
+from models.country import CRITERIA
+from models.decision import DecisionManager, SAWAnalyzer, SensitivityAnalyzer, UserPreferences
+
+
+@pytest.fixture
+def manager():
+    manager = DecisionManager()
+    yield manager
+    manager._stop_writer()
+
+
+def _session():
+    return f'test-{uuid.uuid4().hex[:8]}'
+
+
+def _queue(manager, session_id, count):
+    preferences = UserPreferences(session_id)
+    for _ in range(count):
+        manager.queue_analysis_result(session_id, [], preferences)
+
+
+def test_flush_does_not_wait_for_later_results(manager):
+    session_id = _session()
+    _queue(manager, session_id, 5)
+    
+    # Keep producing while the flush runs; it must only wait for its own marker
+    stop = threading.Event()
+    
+    def produce():
+        while not stop.is_set():
+            _queue(manager, _session(), 1)
+    
+    producer = threading.Thread(target=produce)
+    producer.start()
+    flusher = threading.Thread(target=manager.flush_pending_results)
+    flusher.start()
+    flusher.join(timeout=5)
+    stop.set()
+    producer.join()
+    
+    assert not flusher.is_alive()
+    assert len(manager.get_analysis_history(session_id, limit=10)) == 5
+
+
+def test_full_queue_writes_inline(manager, monkeypatch):
+    monkeypatch.setattr(decision, 'RESULT_QUEUE_SIZE', 1)
+    bounded = DecisionManager()
+    monkeypatch.setattr(bounded, '_ensure_writer', lambda: None)
+    session_id = _session()
+    
+    _queue(bounded, session_id, 3)
+    
+    assert bounded._result_queue.qsize() == 1
+    assert len(bounded.get_analysis_history(session_id, limit=10)) == 2
+
+
+def test_stop_writer_saves_queued_results(manager):
+    session_id = _session()
+    _queue(manager, session_id, 3)
+    
+    manager._stop_writer()
+    
+    assert manager._writer is None
+    assert len(manager.get_analysis_history(session_id, limit=10)) == 3
+
+
+@pytest.mark.parametrize('weights, message', [
+    ((1.0,) * 7, 'Valid'),
+    ((0, 10, 1, 1, 1, 1, 1), 'Valid'),
+    ((1, 1, -0.5, 1, 1, 1, 1), 'Weight 3 cannot be negative'),
+    ((1, 1, 1, 1, 1, 1, 10.5), f'Weight 7 cannot exceed {decision.MAX_WEIGHT}'),
+    ((1, 'heavy', 1, 1, 1, 1, 1), 'Weight 2 must be a number'),
+    ((1, 1, 1, None, 1, 1, 1), 'Weight 4 must be a number'),
+    ((1, 1, 1, 1, [1], 1, 1), 'Weight 5 must be a number'),
+])
+def test_preferences_validate_reports_first_bad_weight(weights, message):
+    is_valid, result = UserPreferences('s', *weights).validate()
+    
+    assert is_valid is (message == 'Valid')
+    assert result == message
+
+
+def test_history_cursor_returns_only_older_entries(manager):
+    session_id = _session()
+    preferences = UserPreferences(session_id)
+    ids = [manager.save_analysis_result(session_id, [], preferences) for _ in range(4)]
+    
+    newest = manager.get_analysis_history(session_id, limit=2)
+    older = manager.get_analysis_history(session_id, limit=10, before=(newest[-1]['created_at'], newest[-1]['id']))
+    
+    assert [entry['id'] for entry in newest + older] == ids[::-1]
+
+
+@pytest.mark.parametrize('num_countries', [50, 5000])
+def test_sensitivity_sweep_unchanged_weights_change_no_ranking(num_countries):
+    rng = np.random.default_rng(1)
+    data = {criterion: rng.integers(0, 3, num_countries).astype(float).tolist() for criterion in CRITERIA}
+    names = [f'c{i}' for i in range(num_countries)]
+    weights = {criterion + '_weight': weight for criterion, weight in zip(CRITERIA, [1.5, 2.0, 0.5, 1.0, 1.8, 0.8, 1.3])}
+    
+    result = SensitivityAnalyzer(SAWAnalyzer()).analyze(data, weights, names, [-0.1, 0.0, 0.1])
+    
+    for criterion_results in result['sensitivity_results'].values():
+        assert criterion_results['ranking_changes'][1] == 0
+        assert criterion_results['variations'][1]['top_country'] == result['baseline_ranking'][0]
@@ -0,0 +1,109 @@
+"""Tests for the monolithic app.py endpoints and helpers"""
+
+import json
+import sqlite3
+
+import numpy as np
+
+import app as legacy
+
+
+def _idle_connections():
+    return list(legacy.db_pool._idle.queue)
+
+
+def test_update_unknown_country_leaves_no_open_transaction(legacy_client):
+    response = legacy_client.post('/api/data/update', json={'id': 999999, 'cost_of_living': 5.0})
+    
+    assert response.status_code == 404
+    assert not any(conn.in_transaction for conn in _idle_connections())
+    
+    # Every pooled connection can still start the writer's transaction
+    legacy.write_results([('legacy-after-404', '[]', '{}')])
+
+
+def test_country_cache_sees_writes_from_other_connections(legacy_client):
+    names, _ = legacy.get_country_matrix()
+    assert 'Atlantis' not in names
+    
+    # Simulate another gunicorn worker: its own connection, no local counter bump
+    conn = sqlite3.connect(legacy.DATABASE)
+    with conn:
+        conn.execute(legacy.ADD_COUNTRY_SQL, ('Atlantis', 5, 5, 5, 5, 5, 5, 5))
+    conn.close()
+    
+    names, matrix = legacy.get_country_matrix()
+    assert 'Atlantis' in names
+    assert matrix.shape == (len(names), len(legacy.CRITERIA_ORDER))
+
+
+def test_stop_result_writer_saves_queued_results():
+    for _ in range(3):
+        legacy.queue_result('legacy-shutdown', [], {})
+    
+    legacy._stop_result_writer()
+    
+    assert legacy._result_writer is None
+    with legacy.db_conn() as conn:
+        count = conn.execute("SELECT COUNT(*) FROM decision_results WHERE session_id = 'legacy-shutdown'").fetchone()[0]
+    assert count == 3
+
+
+def test_analyze_returns_and_stores_ranked_results(legacy_client):
+    response = legacy_client.post('/api/decision/analyze', json={'session_id': 'legacy-analyze', 'cost_weight': 2.0})
+    
+    assert response.status_code == 200
+    assert response.mimetype == 'application/json'
+    body = response.get_json()
+    ranks = [result['rank'] for result in body['results']]
+    assert ranks == list(range(1, len(ranks) + 1))
+    assert body['analysis_summary']['top_recommendation'] == body['results'][0]['country']
+    
+    legacy._stop_result_writer()
+    with legacy.db_conn() as conn:
+        stored = conn.execute("SELECT country_scores FROM decision_results WHERE session_id = 'legacy-analyze'").fetchone()
+    assert json.loads(stored[0]) == body['results']
+
+
+def test_analyze_error_keeps_status_code(legacy_client):
+    response = legacy_client.post('/api/decision/analyze', data='not json', content_type='text/plain')
+    
+    assert response.status_code == 500
+    assert response.get_json()['success'] is False
+
+
+def test_health_probe(legacy_client):
+    assert legacy_client.get('/health').status_code == 200
+
+
+def test_columnar_countries_match_rows(legacy_client):
+    rows = legacy_client.get('/api/countries').get_json()['countries']
+    
+    columns = legacy_client.get('/api/countries', query_string={'format': 'columns'}).get_json()['countries_columnar']
+    
+    assert len(columns['id']) == len(rows)
+    by_name = {row['name']: row for row in rows}
+    for i, name in enumerate(columns['name']):
+        assert {field: values[i] for field, values in columns.items()} == by_name[name]
+
+
+def test_add_duplicate_country_is_conflict(legacy_client):
+    country = dict(zip(legacy.COUNTRY_VALUE_FIELDS, ('Legacy Dup', 5, 5, 5, 5, 5, 5, 5)))
+    assert legacy_client.post('/api/countries', json=country).status_code == 201
+    
+    response = legacy_client.post('/api/countries', json=country)
+    
+    assert response.status_code == 409
+    assert 'already exists' in response.get_json()['error']
+
+
+def test_sensitivity_kernel_matches_numpy():
+    rng = np.random.default_rng(11)
+    normalized = rng.uniform(0, 1, size=(9, len(legacy.CRITERIA_ORDER)))
+    weights = rng.uniform(0, 2, size=len(legacy.CRITERIA_ORDER))
+    deltas = np.array(legacy.SENSITIVITY_VARIATIONS, dtype=np.float64)
+    
+    expected = legacy._sensitivity_scores_numpy(normalized, weights, deltas)
+    
+    np.testing.assert_allclose(legacy._sensitivity_scores(normalized, weights, deltas), expected)
+    np.testing.assert_allclose(legacy._sensitivity_scores_loop(normalized, weights, deltas), expected)
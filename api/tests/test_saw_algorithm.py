@@ -0,0 +1,109 @@
+"""Tests for SAWService"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from models.country import CRITERIA
+from services import saw_algorithm
+from services.saw_algorithm import NormalizationConfig, SAWService
+
+
+def _tied_data(num_countries=12):
+    """Countries whose scores tie in groups, so ranking depends on tie-breaking"""
+    rng = np.random.default_rng(7)
+    values = rng.integers(0, 3, size=(len(CRITERIA), num_countries)).astype(float)
+    data = {criterion: row.tolist() for criterion, row in zip(CRITERIA, values)}
+    names = [f'c{i}' for i in range(num_countries)]
+    return data, names
+
+
+@pytest.mark.parametrize('top_k', range(1, 12))
+def test_top_k_is_prefix_of_full_ranking(top_k):
+    service = SAWService()
+    data, names = _tied_data()
+    weights = {criterion + '_weight': 1.0 for criterion in CRITERIA}
+    
+    full = [result.country for result in service.analyze(data, weights, names)]
+    top = service.analyze(data, weights, names, top_k=top_k)
+    
+    assert [result.country for result in top] == full[:top_k]
+    assert [result.rank for result in top] == list(range(1, top_k + 1))
+
+
+def _random_data(num_countries, seed=3, decimals=None):
+    rng = np.random.default_rng(seed)
+    values = rng.uniform(0, 10, size=(len(CRITERIA), num_countries))
+    if decimals is not None:
+        values = np.round(values, decimals)
+    data = {criterion: row.tolist() for criterion, row in zip(CRITERIA, values)}
+    return data, [f'c{i}' for i in range(num_countries)]
+
+
+@pytest.mark.skipif(saw_algorithm._saw_kernel is None, reason='numba is not installed')
+@pytest.mark.parametrize('method', ['min_max', 'z_score', 'vector'])
+def test_fused_kernel_matches_numpy_path(monkeypatch, method):
+    # Rounded data produces exact score ties, which must break the same way on both paths
+    service = SAWService()
+    data, names = _random_data(saw_algorithm.FUSED_KERNEL_MIN_SIZE // len(CRITERIA) + 50, decimals=0)
+    weights = {criterion + '_weight': weight for criterion, weight in zip(CRITERIA, [1.5, 2, 0.5, 1, 1.8, 0.8, 1.3])}
+    config = NormalizationConfig(method=method, criteria_types=service.criteria_types)
+    
+    fused = service.analyze(data, weights, names, config)
+    monkeypatch.setattr(saw_algorithm, 'FUSED_KERNEL_MIN_SIZE', float('inf'))
+    numpy_path = service.analyze(data, weights, names, config)
+    
+    assert [result.country for result in fused] == [result.country for result in numpy_path]
+    np.testing.assert_allclose([result.score for result in fused], [result.score for result in numpy_path], atol=1e-4)
+
+
+@pytest.mark.skipif(saw_algorithm._saw_kernel is None, reason='numba is not installed')
+def test_fused_kernel_handles_concurrent_calls():
+    service = SAWService()
+    data, names = _random_data(saw_algorithm.FUSED_KERNEL_MIN_SIZE // len(CRITERIA) + 50)
+    weights = {criterion + '_weight': 1.0 for criterion in CRITERIA}
+    expected = [(result.country, result.score) for result in service.analyze(data, weights, names)]
+    
+    def run(_):
+        return [(result.country, result.score) for result in service.analyze(data, weights, names)]
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        outputs = list(pool.map(run, range(32)))
+    
+    assert all(output == expected for output in outputs)
+
+
+def test_min_max_kernel_matches_numpy():
+    rng = np.random.default_rng(5)
+    matrix = rng.uniform(0, 10, size=(40, len(CRITERIA)))
+    matrix[:, 2] = 4.0  # constant column normalizes to 1
+    benefit_mask = np.array([i % 2 == 0 for i in range(len(CRITERIA))])
+    
+    np.testing.assert_allclose(saw_algorithm._min_max_kernel(matrix, benefit_mask),
+                               saw_algorithm._min_max_kernel_numpy(matrix, benefit_mask))
+
+
+def test_analyze_batch_matches_single_analyses():
+    service = SAWService()
+    data, names = _random_data(15, decimals=1)
+    criteria_order, normalized = service.normalize_matrix(data)
+    weights_matrix = np.random.default_rng(1).uniform(0, 2, size=(4, len(criteria_order)))
+    
+    scores = service.analyze_batch(normalized, weights_matrix)
+    
+    assert scores.shape == (len(names), 4)
+    for column, weight_row in enumerate(weights_matrix):
+        weights = {criterion + '_weight': float(w) for criterion, w in zip(criteria_order, weight_row)}
+        expected = {result.country: result.score for result in service.analyze(data, weights, names)}
+        np.testing.assert_allclose(np.round(scores[:, column], 4), [expected[name] for name in names])
+
+
+@pytest.mark.parametrize('bad_value', [float('nan'), float('inf'), 'x', None])
+def test_analyze_rejects_non_finite_values(bad_value):
+    data, names = _random_data(5, decimals=1)
+    data['safety_index'][3] = bad_value
+    weights = {criterion + '_weight': 1.0 for criterion in CRITERIA}
+    
+    with pytest.raises(ValueError, match='safety_index at position 3'):
+        SAWService().analyze(data, weights, names)
@@ -0,0 +1,12 @@
+"""
+WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+"""
+
+from app import app, init_database
+
+# Create database tables and sample data once, before workers fork
+init_database()
+
+application = app